@@ -0,0 +1,210 @@
+import threading
+import numpy as np
+from datetime import datetime
+
+# Numeric columns: the 7 soil features in model input order, then area
+FEATURES = ['nitrogen', 'phosphorus', 'potassium', 'ph', 'temperature', 'humidity', 'rainfall']
+NUMERIC_COLUMNS = FEATURES + ['area']
+
+# Categorical columns, stored as int16 codes into a per-history category list
+CATEGORICAL_COLUMNS = ['predicted_crop', 'selected_variant', 'area_unit']
+MISSING_CODE = -1
+
+EPOCH = datetime(1970, 1, 1)
+
+def to_epoch_us(timestamp):
+    """Convert an ISO timestamp (or datetime) to integer microseconds since the epoch
+
+    Saved timestamps are naive local times, so they are counted from a naive epoch
+    and round-trip unchanged through numpy/pandas datetime64[us].
+    """
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    delta = timestamp - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+class AnalysisColumns:
+    """Columnar, NumPy-backed copy of one user's analysis history
+
+    Arrays are over-allocated and grown geometrically, so appends are amortised O(1)
+    and aggregates/filters are plain vectorised NumPy operations on the live slice.
+    """
+
+    def __init__(self, capacity=16):
+        self.size = 0
+        self._numeric = np.full((capacity, len(NUMERIC_COLUMNS)), np.nan, dtype=np.float32)
+        self._timestamps = np.zeros(capacity, dtype=np.int64)
+        self._codes = np.full((capacity, len(CATEGORICAL_COLUMNS)), MISSING_CODE, dtype=np.int16)
+        self.categories = {column: [] for column in CATEGORICAL_COLUMNS}
+        self._category_index = {column: {} for column in CATEGORICAL_COLUMNS}
+        self._in_time_order = True  # Histories are appended with datetime.now(), so normally sorted
+        self._time_order = None     # Cached argsort of timestamps when they are not
+
+    @classmethod
+    def from_analyses(cls, analyses):
+        """Build columns from a list of Analysis records"""
+        columns = cls(capacity=max(16, len(analyses)))
+        for analysis in analyses:
+            columns.append(analysis)
+        return columns
+
+    def _grow(self):
+        """Double the capacity of every column"""
+        capacity = len(self._timestamps) * 2
+        numeric = np.full((capacity, len(NUMERIC_COLUMNS)), np.nan, dtype=np.float32)
+        numeric[:self.size] = self._numeric[:self.size]
+        timestamps = np.zeros(capacity, dtype=np.int64)
+        timestamps[:self.size] = self._timestamps[:self.size]
+        codes = np.full((capacity, len(CATEGORICAL_COLUMNS)), MISSING_CODE, dtype=np.int16)
+        codes[:self.size] = self._codes[:self.size]
+        self._numeric, self._timestamps, self._codes = numeric, timestamps, codes
+
+    def _encode(self, column, value):
+        """Get the category code for a value, adding it if new"""
+        if value is None or value == '':
+            return MISSING_CODE
+        index = self._category_index[column]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(self.categories[column])
+            self.categories[column].append(value)
+        return code
+
+    def append(self, analysis):
+        """Append one saved Analysis record"""
+        if self.size == len(self._timestamps):
+            self._grow()
+
+        row = self.size
+        for col, name in enumerate(NUMERIC_COLUMNS):
+            try:
+                self._numeric[row, col] = float(getattr(analysis, name))
+            except (TypeError, ValueError):
+                self._numeric[row, col] = np.nan
+        self._timestamps[row] = to_epoch_us(analysis.timestamp)
+        if row and self._timestamps[row] < self._timestamps[row - 1]:
+            self._in_time_order = False
+        self._time_order = None
+        for col, name in enumerate(CATEGORICAL_COLUMNS):
+            self._codes[row, col] = self._encode(name, getattr(analysis, name))
+        self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def numeric(self):
+        """(n, 8) float32 array of soil features and area"""
+        return self._numeric[:self.size]
+
+    @property
+    def features(self):
+        """(n, 7) float32 array of soil features in model input order"""
+        return self._numeric[:self.size, :len(FEATURES)]
+
+    @property
+    def timestamps(self):
+        """int64 epoch-microsecond timestamps"""
+        return self._timestamps[:self.size]
+
+    def codes(self, column):
+        """int16 category codes of a categorical column"""
+        return self._codes[:self.size, CATEGORICAL_COLUMNS.index(column)]
+
+    def decode(self, column, rows=None):
+        """Decode a categorical column (optionally only some rows) to values"""
+        labels = np.array(self.categories[column] + [None], dtype=object)
+        codes = self.codes(column) if rows is None else self.codes(column)[rows]
+        return labels[codes]  # MISSING_CODE (-1) maps to the trailing None
+
+    def time_index(self):
+        """Sorted timestamp index: (row order, sorted timestamps)
+
+        Row order is None when rows are already in time order, which is the common case.
+        """
+        if self._in_time_order:
+            return None, self.timestamps
+        if self._time_order is None:
+            self._time_order = np.argsort(self.timestamps, kind='stable')
+        return self._time_order, self.timestamps[self._time_order]
+
+    def select_rows(self, since=None, until=None, limit=None, after=None, newest_first=False):
+        """Select row numbers in a time range with binary searches on the time index
+
+        `since` is inclusive and `until` exclusive. `after` is a keyset cursor: the
+        (timestamp, row number) of the last analysis of the previous page; only rows
+        past it (older when `newest_first`, newer otherwise) are returned, at most
+        `limit` of them. The row number orders analyses saved at the same timestamp.
+        """
+        order, timestamps = self.time_index()
+        low = 0 if since is None else int(np.searchsorted(timestamps, to_epoch_us(since), 'left'))
+        high = self.size if until is None else int(np.searchsorted(timestamps, to_epoch_us(until), 'left'))
+        if after is not None:
+            after_time, after_row = after
+            cursor = to_epoch_us(after_time)
+            tie_low = int(np.searchsorted(timestamps, cursor, 'left'))
+            tie_high = int(np.searchsorted(timestamps, cursor, 'right'))
+            # The stable sort keeps rows with equal timestamps in row order
+            tie_rows = np.arange(tie_low, tie_high) if order is None else order[tie_low:tie_high]
+            split = tie_low + int(np.searchsorted(tie_rows, after_row, 'left' if newest_first else 'right'))
+            if newest_first:
+                high = min(high, split)
+            else:
+                low = max(low, split)
+
+        high = max(low, high)
+        if limit is not None:
+            if newest_first:
+                low = max(low, high - limit)
+            else:
+                high = min(high, low + limit)
+
+        positions = np.arange(low, high)
+        if newest_first:
+            positions = positions[::-1]
+        return positions if order is None else order[positions]
+
+    def count_since(self, since):
+        """Count analyses at or after a datetime"""
+        _, timestamps = self.time_index()
+        return self.size - int(np.searchsorted(timestamps, to_epoch_us(since), 'left'))
+
+    def distinct_count(self, column):
+        """Count distinct non-missing values of a categorical column"""
+        codes = self.codes(column)
+        return int(np.unique(codes[codes != MISSING_CODE]).size)
+
+    def memory_bytes(self):
+        """Memory used by the column arrays"""
+        return self._numeric.nbytes + self._timestamps.nbytes + self._codes.nbytes
+
+_lock = threading.Lock()
+_columns_cache = {}
+
+def get_analysis_columns(username, analyses):
+    """Get the columnar history for a user, building it once and appending new analyses
+
+    The saved history is append-only, so a cached copy is extended with the tail of
+    `analyses`; it is rebuilt only if the history no longer lines up with the cache.
+    """
+    with _lock:
+        columns = _columns_cache.get(username)
+        if columns is not None and columns.size <= len(analyses):
+            last = columns.size - 1
+            if last < 0 or columns.timestamps[last] == to_epoch_us(analyses[last].timestamp):
+                for analysis in analyses[columns.size:]:
+                    columns.append(analysis)
+                return columns
+
+        columns = AnalysisColumns.from_analyses(analyses)
+        _columns_cache[username] = columns
+        return columns
+
+def append_analysis_column(username, analysis):
+    """Append a newly saved analysis to a user's cached columns, if built"""
+    with _lock:
+        columns = _columns_cache.get(username)
+        if columns is not None:
+            columns.append(analysis)
@@ -0,0 +1,137 @@
+import os
+import json
+import threading
+
+from backend.user_directory import get_directory_totals
+
+# Pre-aggregated analytics, updated on every saved analysis and registration
+ANALYTICS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'analytics_rollups.json')
+
+# Histogram ranges per soil feature, matching the soil analysis form
+HISTOGRAM_BINS = 20
+HISTOGRAM_RANGES = {
+    'nitrogen': (0.0, 200.0),
+    'phosphorus': (0.0, 200.0),
+    'potassium': (0.0, 200.0),
+    'ph': (0.0, 14.0),
+    'temperature': (-10.0, 50.0),
+    'humidity': (0.0, 100.0),
+    'rainfall': (0.0, 500.0)
+}
+
+_lock = threading.Lock()
+_cache = {"mtime": None, "rollups": None}
+
+def empty_rollups():
+    """Create empty rollup tables"""
+    return {
+        'bins': HISTOGRAM_BINS,
+        'ranges': {feature: list(bounds) for feature, bounds in HISTOGRAM_RANGES.items()},
+        'daily_crops': {},    # 'YYYY-MM-DD' -> {crop: analyses}
+        'histograms': {feature: [0] * HISTOGRAM_BINS for feature in HISTOGRAM_RANGES},
+        'daily_signups': {},  # 'YYYY-MM-DD' -> registrations
+        'analyses_count': 0,
+        'users_count': 0
+    }
+
+def histogram_bin(feature, value):
+    """Get the histogram bin of a feature value (out-of-range values go to the end bins)"""
+    low, high = HISTOGRAM_RANGES[feature]
+    index = int((value - low) / (high - low) * HISTOGRAM_BINS)
+    return min(max(index, 0), HISTOGRAM_BINS - 1)
+
+def _add_analysis(rollups, analysis):
+    """Count one analysis into the rollup tables"""
+    day = analysis.timestamp.strftime('%Y-%m-%d')
+    crops = rollups['daily_crops'].setdefault(day, {})
+    crop = analysis.predicted_crop or 'unknown'
+    crops[crop] = crops.get(crop, 0) + 1
+
+    for feature, counts in rollups['histograms'].items():
+        value = getattr(analysis, feature)
+        if value is not None:
+            counts[histogram_bin(feature, float(value))] += 1
+    rollups['analyses_count'] += 1
+
+def _add_signup(rollups, profile):
+    """Count one registered user into the rollup tables"""
+    if profile.created_at:
+        day = profile.created_at.strftime('%Y-%m-%d')
+        rollups['daily_signups'][day] = rollups['daily_signups'].get(day, 0) + 1
+    rollups['users_count'] += 1
+
+def _read_rollups():
+    """Read the rollups file, reusing the in-memory copy while it is unchanged"""
+    try:
+        mtime = os.path.getmtime(ANALYTICS_FILE)
+    except OSError:
+        return None
+    if _cache["mtime"] != mtime:
+        try:
+            with open(ANALYTICS_FILE, 'r', encoding='utf-8') as file:
+                _cache.update({"mtime": mtime, "rollups": json.load(file)})
+        except (OSError, ValueError):
+            return None
+    return _cache["rollups"]
+
+def _write_rollups(rollups):
+    """Save the rollups file atomically"""
+    os.makedirs(os.path.dirname(ANALYTICS_FILE), exist_ok=True)
+    tmp_file = f"{ANALYTICS_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump(rollups, file, ensure_ascii=False)
+    os.replace(tmp_file, ANALYTICS_FILE)
+    _cache.update({"mtime": os.path.getmtime(ANALYTICS_FILE), "rollups": rollups})
+
+def _is_current(rollups):
+    """Check rollups were built with the current bins and cover every user and analysis"""
+    if rollups is None or rollups.get('bins') != HISTOGRAM_BINS:
+        return False
+    if rollups.get('ranges') != {feature: list(bounds) for feature, bounds in HISTOGRAM_RANGES.items()}:
+        return False
+    users_count, analyses_count = get_directory_totals()
+    return rollups['users_count'] == users_count and rollups['analyses_count'] == analyses_count
+
+def rebuild_rollups():
+    """Rebuild every rollup table from the full user store"""
+    from backend.auth import load_user_profiles
+
+    rollups = empty_rollups()
+    for profile in load_user_profiles().values():
+        _add_signup(rollups, profile)
+        for analysis in profile.analyses:
+            _add_analysis(rollups, analysis)
+    with _lock:
+        _write_rollups(rollups)
+    return rollups
+
+def get_rollups():
+    """Get the analytics rollups, rebuilding them only if they are missing or out of step"""
+    with _lock:
+        rollups = _read_rollups()
+    if not _is_current(rollups):
+        rollups = rebuild_rollups()
+    return rollups
+
+def record_analysis(analysis):
+    """Add a newly saved analysis to the rollups"""
+    with _lock:
+        rollups = _read_rollups()
+        if rollups is None:
+            return  # Built from the full store on first read
+        _add_analysis(rollups, analysis)
+        _write_rollups(rollups)
+
+def record_signup(profile):
+    """Add a newly registered user to the rollups"""
+    record_signups([profile])
+
+def record_signups(profiles):
+    """Add newly registered users to the rollups with one write"""
+    with _lock:
+        rollups = _read_rollups()
+        if rollups is None:
+            return  # Built from the full store on first read
+        for profile in profiles:
+            _add_signup(rollups, profile)
+        _write_rollups(rollups)
@@ -2,24 +2,88 @@ import streamlit as st
 import yaml
 import os
 import hashlib
-from datetime import datetime
+import threading
+import csv
+from io import StringIO
+from datetime import datetime, timedelta
+
+from backend.analysis_columns import get_analysis_columns, append_analysis_column
+from backend.records import Analysis, UserProfile
 
 # User data file
 USER_DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'users.yaml')
 
+# Role hierarchy: super_admin > admin > user
+ASSIGNABLE_ROLES = {
+    "super_admin": ["user", "admin", "super_admin"],
+    "admin": ["user", "admin"]  # admin cannot promote to super_admin
+}
+
+# YAML codecs, using the libyaml bindings when available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+_profiles_lock = threading.Lock()
+_profiles_cache = {"version": None, "profiles": None}
+
+def user_data_version():
+    """Identify the current contents of the user data file by size and modification time"""
+    try:
+        stat = os.stat(USER_DATA_FILE)
+        return (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return None
+
 def load_user_data():
     """Load user data from YAML file"""
     os.makedirs(os.path.dirname(USER_DATA_FILE), exist_ok=True)
     if os.path.exists(USER_DATA_FILE):
         with open(USER_DATA_FILE, 'r') as file:
-            return yaml.safe_load(file) or {}
+            return yaml.load(file, Loader=YAML_LOADER) or {}
     return {}
 
 def save_user_data(data):
     """Save user data to YAML file"""
     os.makedirs(os.path.dirname(USER_DATA_FILE), exist_ok=True)
-    with open(USER_DATA_FILE, 'w') as file:
-        yaml.dump(data, file, default_flow_style=False)
+    tmp_file = f"{USER_DATA_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as file:
+        yaml.dump(data, file, Dumper=YAML_DUMPER, default_flow_style=False)
+    os.replace(tmp_file, USER_DATA_FILE)
+
+def load_user_profiles():
+    """Load all users as UserProfile records, parsing users.yaml only when it changes
+
+    The records are shared with later calls; edit them only right before save_user_profiles.
+    """
+    with _profiles_lock:
+        version = user_data_version()
+        if version is None or _profiles_cache["version"] != version:
+            profiles = {username: UserProfile.from_dict(username, entry) for username, entry in load_user_data().items()}
+            _profiles_cache.update({"version": version, "profiles": profiles})
+        return _profiles_cache["profiles"]
+
+def save_user_profiles(profiles, analyses_only=None):
+    """Save UserProfile records to users.yaml
+
+    Pass the username as `analyses_only` when only that user's analyses changed:
+    the user directory then journals the new count instead of being rewritten.
+    """
+    with _profiles_lock:
+        previous_version = _profiles_cache["version"]
+        try:
+            save_user_data({username: profile.to_dict() for username, profile in profiles.items()})
+        except BaseException:
+            # Callers edit the cached records in place; drop them so the next load re-reads the file
+            _profiles_cache.update({"version": None, "profiles": None})
+            raise
+        version = user_data_version()
+        _profiles_cache.update({"version": version, "profiles": profiles})
+
+    from backend.user_directory import write_user_directory, record_analysis_count
+    if analyses_only is not None:
+        record_analysis_count(profiles[analyses_only], version, previous_version)
+    else:
+        write_user_directory(profiles, version)
 
 def hash_password(password):
     """Hash password using SHA256"""
@@ -27,9 +91,9 @@ def hash_password(password):
 
 def register_user(username, password, email, name, role="user"):
     """Register a new user"""
-    user_data = load_user_data()
+    profiles = load_user_profiles()
 
-    if username in user_data:
+    if username in profiles:
         return False, "Username already exists"
 
     if not all([username, password, email, name]):
@@ -39,30 +103,33 @@ def register_user(username, password, email, name, role="user"):
         return False, "Password must be at least 6 characters long"
 
     hashed_password = hash_password(password)
-    user_data[username] = {
-        'password': hashed_password,
-        'email': email,
-        'name': name,
-        'role': role,
-        'created_at': datetime.now().isoformat(),
-        'analyses': []
-    }
-
-    save_user_data(user_data)
+    profiles[username] = UserProfile(
+        username,
+        password=hashed_password,
+        email=email,
+        name=name,
+        role=role,
+        created_at=datetime.now()
+    )
+
+    save_user_profiles(profiles)
+
+    from backend.analytics import record_signup
+    record_signup(profiles[username])
     return True, "Registration successful"
 
 def authenticate_user(username, password):
     """Authenticate user login"""
-    user_data = load_user_data()
+    profiles = load_user_profiles()
 
-    if username not in user_data:
+    if username not in profiles:
         return False, "Username not found"
 
     hashed_password = hash_password(password)
-    if user_data[username]['password'] != hashed_password:
+    if profiles[username].password != hashed_password:
         return False, "Incorrect password"
 
-    return True, user_data[username]
+    return True, profiles[username]
 
 def is_authenticated():
     """Check if user is currently authenticated"""
@@ -78,8 +145,7 @@ def get_current_user():
     """Get current user data"""
     if is_authenticated():
         username = st.session_state.get("username")
-        user_data = load_user_data()
-        return user_data.get(username)
+        return load_user_profiles().get(username)
     return None
 
 def logout():
@@ -117,7 +183,13 @@ def get_all_users():
     """Get all users (admin only)"""
     if get_user_role() not in ["admin", "super_admin"]:
         return None
-    return load_user_data()
+    return load_user_profiles()
+
+def get_user(username):
+    """Get one user's profile (admin only; served from the cached user store)"""
+    if get_user_role() not in ["admin", "super_admin"]:
+        return None
+    return load_user_profiles().get(username)
 
 def update_user_role(username, new_role):
     """Update user role (admin only)"""
@@ -125,21 +197,15 @@ def update_user_role(username, new_role):
     if current_role not in ["admin", "super_admin"]:
         return False, "Permission denied"
 
-    # Role hierarchy: super_admin > admin > user
-    allowed_roles = {
-        "super_admin": ["user", "admin", "super_admin"],
-        "admin": ["user", "admin"]  # admin cannot promote to super_admin
-    }
-
-    if new_role not in allowed_roles.get(current_role, []):
+    if new_role not in ASSIGNABLE_ROLES.get(current_role, []):
         return False, f"You cannot assign the '{new_role}' role"
 
-    user_data = load_user_data()
-    if username not in user_data:
+    profiles = load_user_profiles()
+    if username not in profiles:
         return False, "User not found"
 
-    user_data[username]['role'] = new_role
-    save_user_data(user_data)
+    profiles[username].role = new_role
+    save_user_profiles(profiles)
     return True, "Role updated successfully"
 
 def deactivate_user(username):
@@ -147,13 +213,13 @@ def deactivate_user(username):
     if get_user_role() not in ["admin", "super_admin"]:
         return False, "Permission denied"
 
-    user_data = load_user_data()
-    if username not in user_data:
+    profiles = load_user_profiles()
+    if username not in profiles:
         return False, "User not found"
 
     # Add deactivated status
-    user_data[username]['active'] = False
-    save_user_data(user_data)
+    profiles[username].active = False
+    save_user_profiles(profiles)
     return True, "User deactivated successfully"
 
 def activate_user(username):
@@ -161,53 +227,146 @@ def activate_user(username):
     if get_user_role() not in ["admin", "super_admin"]:
         return False, "Permission denied"
 
-    user_data = load_user_data()
-    if username not in user_data:
+    profiles = load_user_profiles()
+    if username not in profiles:
         return False, "User not found"
 
-    user_data[username]['active'] = True
-    save_user_data(user_data)
+    profiles[username].active = True
+    save_user_profiles(profiles)
     return True, "User activated successfully"
 
+def bulk_update_users(updates):
+    """Apply role and status changes to many users in one read-modify-write (admin only)
+
+    `updates` is a list of dicts with a 'username' and a new 'role' and/or 'active'
+    flag. Valid rows are applied together and users.yaml is written once; returns one
+    {'username', 'success', 'message'} outcome per row, in order.
+    """
+    current_role = get_user_role()
+    if current_role not in ["admin", "super_admin"]:
+        return [{'username': u.get('username'), 'success': False, 'message': "Permission denied"} for u in updates]
+
+    allowed_roles = ASSIGNABLE_ROLES.get(current_role, [])
+    profiles = load_user_profiles()
+    outcomes = []
+    changed = False
+    for update in updates:
+        username = update.get('username')
+        new_role = update.get('role')
+        active = update.get('active')
+        profile = profiles.get(username)
+
+        if profile is None:
+            outcomes.append({'username': username, 'success': False, 'message': "User not found"})
+        elif new_role is None and active is None:
+            outcomes.append({'username': username, 'success': False, 'message': "Nothing to change"})
+        elif new_role is not None and new_role not in allowed_roles:
+            outcomes.append({'username': username, 'success': False, 'message': f"You cannot assign the '{new_role}' role"})
+        else:
+            messages = []
+            if new_role is not None:
+                profile.role = new_role
+                messages.append(f"role set to {new_role}")
+            if active is not None:
+                profile.active = active
+                messages.append("activated" if active else "deactivated")
+            changed = True
+            outcomes.append({'username': username, 'success': True, 'message': ", ".join(messages).capitalize()})
+
+    if changed:
+        save_user_profiles(profiles)
+    return outcomes
+
+def parse_user_updates_csv(text):
+    """Parse a bulk user update CSV with columns username, role, status
+
+    Blank role/status cells leave that field unchanged; status is "active" or
+    "inactive". Returns (updates, outcomes for rows that could not be parsed).
+    """
+    reader = csv.DictReader(StringIO(text))
+    fields = [f.strip().lower() for f in reader.fieldnames or []]
+    if 'username' not in fields:
+        return [], [{'username': None, 'success': False, 'message': "CSV must have a 'username' column"}]
+    reader.fieldnames = fields
+
+    updates = []
+    errors = []
+    for line, row in enumerate(reader, start=2):
+        username = (row.get('username') or '').strip()
+        role = (row.get('role') or '').strip().lower() or None
+        status = (row.get('status') or '').strip().lower()
+
+        if not username:
+            errors.append({'username': None, 'success': False, 'message': f"Row {line}: missing username"})
+        elif status not in ('', 'active', 'inactive'):
+            errors.append({'username': username, 'success': False, 'message': f"Row {line}: unknown status '{status}'"})
+        else:
+            updates.append({'username': username, 'role': role, 'active': None if not status else status == 'active'})
+    return updates, errors
+
 def get_user_activity(username):
     """Get user activity data"""
-    user_data = load_user_data()
-    if username not in user_data:
+    user = load_user_profiles().get(username)
+    if user is None:
         return None
-    user = user_data[username]
     return {
-        'analyses_count': len(user.get('analyses', [])),
-        'created_at': user.get('created_at'),
-        'last_analysis': user.get('analyses', [])[-1] if user.get('analyses') else None
+        'analyses_count': len(user.analyses),
+        'created_at': user['created_at'],
+        'last_analysis': user.analyses[-1].to_dict() if user.analyses else None
     }
 
-def get_user_analyses(username):
-    """Get user's analysis history"""
-    user_data = load_user_data()
-    if username in user_data:
-        return user_data[username]['analyses']
-    return []
+def _analysis_cursor(columns, analyses, analysis, newest_first):
+    """Turn an Analysis record into the (timestamp, row) cursor select_rows expects"""
+    tied = columns.select_rows(since=analysis.timestamp, until=analysis.timestamp + timedelta(microseconds=1))
+    for i in tied:
+        if analyses[i] is analysis:
+            return analysis.timestamp, int(i)
+    for i in tied:
+        if analyses[i].to_dict() == analysis.to_dict():
+            return analysis.timestamp, int(i)
+    # Not in this history: continue past every analysis saved at that time
+    return analysis.timestamp, -1 if newest_first else len(analyses)
+
+def get_user_analyses(username, since=None, until=None, limit=None, after=None, newest_first=False):
+    """Get user's analysis history, optionally a time range or one cursor page of it
+
+    `since`/`until` bound the timestamps (inclusive/exclusive). For pagination pass
+    `limit`, then the last Analysis returned as `after` for the next page (a
+    (timestamp, row number) pair is accepted too). Analyses saved at the same
+    timestamp are neither skipped nor repeated between pages.
+    """
+    user = load_user_profiles().get(username)
+    if user is None:
+        return []
+    if since is None and until is None and limit is None and after is None and not newest_first:
+        return user.analyses
+
+    columns = get_analysis_columns(username, user.analyses)
+    if isinstance(after, Analysis):
+        after = _analysis_cursor(columns, user.analyses, after, newest_first)
+    rows = columns.select_rows(since, until, limit, after, newest_first)
+    return [user.analyses[i] for i in rows]
 
 def save_analysis(username, analysis_data):
     """Save analysis data for user"""
-    user_data = load_user_data()
-    if username in user_data:
-        if 'analyses' not in user_data[username]:
-            user_data[username]['analyses'] = []
-        analysis_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "data": analysis_data
-        }
-        user_data[username]['analyses'].append(analysis_entry)
-        save_user_data(user_data)
+    profiles = load_user_profiles()
+    if username in profiles:
+        analysis_entry = Analysis(datetime.now(), **analysis_data)
+        profiles[username].analyses.append(analysis_entry)
+        save_user_profiles(profiles, analyses_only=username)
+
+        from backend.similarity_index import add_analysis_to_index
+        from backend.analytics import record_analysis
+        append_analysis_column(username, analysis_entry)
+        add_analysis_to_index(username, analysis_entry)
+        record_analysis(analysis_entry)
         return True
     return False
 
 # Initialize default admin user if not exists
 def initialize_default_admin():
     """Create default admin user if no users exist"""
-    user_data = load_user_data()
-    if not user_data:
+    if not load_user_profiles():
         # Create default admin
         register_user("admin", "admin123", "admin@agrisakha.com", "System Admin", "super_admin")
         print("Default admin user created: admin/admin123")
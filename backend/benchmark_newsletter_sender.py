@@ -0,0 +1,43 @@
+# backend/benchmark_newsletter_sender.py
+# Campaign delivery throughput (messages/second) against the local SMTP sink, by connection pool size.
+# Run from the project root: python -m backend.benchmark_newsletter_sender [n_messages] [latency_ms]
+import sys
+import time
+import smtplib
+
+from backend.smtp_sink import start_smtp_sink
+from backend.newsletter_sender import SMTPConnectionPool, render_message, deliver, BATCH_SIZE
+
+N_MESSAGES = 2000
+LATENCY_MS = 5
+POOL_SIZES = [1, 2, 4, 8, 16]
+
+def unpooled_send(server, message, recipients):
+    """Baseline: a new connection for every message, one at a time"""
+    host, port = server.server_address
+    for recipient in recipients:
+        with smtplib.SMTP(host, port) as connection:
+            connection.sendmail("newsletter@smartsoil.local", [recipient], f"To: {recipient}\r\n".encode() + message)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_MESSAGES
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY_MS
+    server = start_smtp_sink(port=0, latency=latency_ms / 1000, keep_messages=False)
+    host, port = server.server_address
+    message = render_message("Benchmark", "Seasonal sowing advice for your region.\n" * 40)
+    recipients = [f"subscriber{i}@example.com" for i in range(n)]
+
+    print(f"{n:,} messages, {latency_ms:g} ms simulated relay latency, batches of {BATCH_SIZE}")
+    baseline_n = min(n, 500)
+    start = time.perf_counter()
+    unpooled_send(server, message, recipients[:baseline_n])
+    print(f"Connection per message:  {baseline_n / (time.perf_counter() - start):8.0f} msg/s ({baseline_n:,} messages)")
+
+    for size in POOL_SIZES:
+        pool = SMTPConnectionPool(host, port, size=size)
+        start = time.perf_counter()
+        sent, failed = deliver(message, recipients, pool=pool, pool_size=size)
+        elapsed = time.perf_counter() - start
+        pool.close()
+        print(f"Pool of {size:2d} connections: {sent / elapsed:8.0f} msg/s ({failed} failed)")
+    server.shutdown()
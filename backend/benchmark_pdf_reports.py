@@ -0,0 +1,133 @@
+# backend/benchmark_pdf_reports.py
+# Micro-benchmark of group PDF rendering: per-call style construction vs the shared report template.
+# The template path does more work per page (header and footer), so the comparison is not like for like.
+# Run from the project root: python -m backend.benchmark_pdf_reports
+import time
+from datetime import datetime
+from io import BytesIO
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib import colors
+
+from backend.pdf_reports import generate_group_pdf_report
+
+ITERATIONS = 200
+
+SAMPLE_REPORT = {
+    'group_id': "Group 5 analyses (2025-10-01 to 2025-10-11)",
+    'predicted_crop': 'rice',
+    'avg_parameters': {
+        'nitrogen': 82.4, 'phosphorus': 41.2, 'potassium': 39.8, 'ph': 6.4,
+        'temperature': 24.1, 'humidity': 81.3, 'rainfall': 212.7
+    },
+    'plan': {
+        'summary': "Transplanted rice on puddled soil (Default variant)",
+        'duration_weeks': 18,
+        'land_preparation': ["Puddle field 2-3 times", "Level the field", "Maintain 2-3 cm water"],
+        'fertilizer': {'basal': "50 kg N, 30 kg P, 30 kg K per ha", 'top_dressing': "Split N at tillering and panicle initiation"},
+        'irrigation': ["Keep 5 cm standing water", "Drain 10 days before harvest"]
+    },
+    'analyses_count': 5
+}
+
+def legacy_group_pdf_report(report):
+    """Group PDF as rendered before the shared template (copied verbatim from the original Reports page)"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+
+    # Custom styles
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    heading_style = ParagraphStyle(
+        'Heading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=20
+    )
+    normal_style = styles['Normal']
+
+    elements = []
+
+    # Title
+    elements.append(Paragraph("Group Soil Analysis Report", title_style))
+    elements.append(Spacer(1, 12))
+
+    # Group Info
+    elements.append(Paragraph(f"Report ID: {report['group_id']}", normal_style))
+    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Predicted Crop
+    elements.append(Paragraph(f"Predicted Crop: {report['predicted_crop']}", heading_style))
+    elements.append(Paragraph("Confidence: Based on averaged parameters", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Averaged Soil Parameters Table
+    elements.append(Paragraph("Averaged Soil Parameters:", heading_style))
+
+    param_data = [
+        ['Parameter', 'Average Value', 'Unit'],
+        ['Nitrogen', f"{report['avg_parameters']['nitrogen']:.1f}", 'ppm'],
+        ['Phosphorus', f"{report['avg_parameters']['phosphorus']:.1f}", 'ppm'],
+        ['Potassium', f"{report['avg_parameters']['potassium']:.1f}", 'ppm'],
+        ['pH', f"{report['avg_parameters']['ph']:.1f}", ''],
+        ['Temperature', f"{report['avg_parameters']['temperature']:.1f}", '°C'],
+        ['Humidity', f"{report['avg_parameters']['humidity']:.1f}", '%'],
+        ['Rainfall', f"{report['avg_parameters']['rainfall']:.1f}", 'cm']
+    ]
+
+    table = Table(param_data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(table)
+    elements.append(Spacer(1, 20))
+
+    # Implementation Plan
+    if report['plan']:
+        elements.append(Paragraph("Implementation Plan:", heading_style))
+        for key, value in report['plan'].items():
+            elements.append(Paragraph(f"<b>{key.title()}:</b>", normal_style))
+            if isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    elements.append(Paragraph(f"  • {sub_key}: {sub_value}", normal_style))
+            elif isinstance(value, list):
+                for item in value:
+                    elements.append(Paragraph(f"  • {item}", normal_style))
+            else:
+                elements.append(Paragraph(f"  {value}", normal_style))
+            elements.append(Spacer(1, 6))
+
+    # Build PDF
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+def pdfs_per_second(render, iterations=ITERATIONS):
+    """Render the sample report repeatedly and return throughput"""
+    render(SAMPLE_REPORT)  # Warm up font and style caches
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(SAMPLE_REPORT)
+    return iterations / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    before = pdfs_per_second(legacy_group_pdf_report)
+    after = pdfs_per_second(generate_group_pdf_report)
+    print(f"Per-call styles:  {before:.1f} PDFs/s")
+    print(f"Shared template:  {after:.1f} PDFs/s ({(after / before - 1) * 100:+.1f}%)")
+    print("Note: the shared template also draws a header and footer on every page, which the baseline does not.")
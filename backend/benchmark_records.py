@@ -0,0 +1,70 @@
+# backend/benchmark_records.py
+# Memory comparison of an analysis history held as YAML-style dicts vs __slots__ Analysis records.
+# Run from the project root: python -m backend.benchmark_records [n_analyses]
+import sys
+import json
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from backend.records import Analysis
+
+N_ANALYSES = 1_000_000
+
+CROPS = ['rice', 'maize', 'chickpea', 'kidneybeans', 'cotton', 'banana', 'mango', 'coffee']
+VARIANTS = ['Default', 'Organic', 'Low Water']
+
+def stored_analyses(n, seed=0):
+    """Yield saved analyses as JSON text, one document per analysis
+
+    Each analysis is decoded on its own, so (like yaml.safe_load) every dict gets fresh
+    key and value strings. `selected_plan` is left out: it costs the same in both layouts.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(n):
+        yield json.dumps({
+            'timestamp': (start + timedelta(minutes=7 * i)).isoformat(),
+            'data': {
+                'nitrogen': rng.uniform(0, 140),
+                'phosphorus': rng.uniform(5, 145),
+                'potassium': rng.uniform(5, 205),
+                'ph': rng.uniform(3.5, 9.9),
+                'temperature': rng.uniform(8, 43),
+                'humidity': rng.uniform(14, 99),
+                'rainfall': rng.uniform(20, 298),
+                'area': rng.choice([0.5, 1.0, 2.0, 5.0]),
+                'area_unit': 'hectares',
+                'predicted_crop': rng.choice(CROPS),
+                'variants': VARIANTS,
+                'selected_variant': rng.choice(VARIANTS)
+            }
+        })
+
+def measure(build, n):
+    """Build a history and return (traced bytes held, seconds to build)"""
+    tracemalloc.start()
+    start = datetime.now()
+    history = build(n)
+    elapsed = (datetime.now() - start).total_seconds()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return current, elapsed
+
+def build_dicts(n):
+    """History as loaded before: plain dicts with ISO timestamp strings"""
+    return [json.loads(text) for text in stored_analyses(n)]
+
+def build_records(n):
+    """History as loaded now: Analysis records with parsed timestamps"""
+    return [Analysis.from_dict(json.loads(text)) for text in stored_analyses(n)]
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_ANALYSES
+    dict_bytes, dict_seconds = measure(build_dicts, n)
+    record_bytes, record_seconds = measure(build_records, n)
+    print(f"{n:,} analyses")
+    print(f"Dicts:          {dict_bytes / 2**20:8.1f} MiB ({dict_bytes / n:.0f} B/analysis, built in {dict_seconds:.1f}s)")
+    print(f"Slots records:  {record_bytes / 2**20:8.1f} MiB ({record_bytes / n:.0f} B/analysis, built in {record_seconds:.1f}s)")
+    print(f"Saved:          {(1 - record_bytes / dict_bytes) * 100:.1f}%")
@@ -0,0 +1,62 @@
+import os
+import csv
+import zipfile
+import multiprocessing
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from backend.group_reports import get_group_reports, group_report_csv_row, group_report_filename
+from backend.pdf_reports import get_group_pdf
+
+# Render workers start from a clean interpreter instead of being forked from the
+# multithreaded server, so they cannot inherit a lock another thread was holding
+POOL_CONTEXT = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+def _render_group_files(task):
+    """Render the PDF and CSV for one group report (runs in a worker process)"""
+    username, index, report = task
+    pdf_data = get_group_pdf(report)
+
+    output = StringIO()
+    row = group_report_csv_row(report)
+    writer = csv.DictWriter(output, fieldnames=list(row.keys()))
+    writer.writeheader()
+    writer.writerow(row)
+
+    prefix = f"{username}/group_{index + 1:03d}_"
+    return [
+        (prefix + group_report_filename(report, 'pdf'), pdf_data),
+        (prefix + group_report_filename(report, 'csv'), output.getvalue().encode('utf-8'))
+    ]
+
+def export_group_reports_zip(users, model, encoder, plans, output, max_workers=None, progress_callback=None):
+    """Export every group report of the given users as a ZIP of PDFs and CSVs
+
+    `users` maps usernames to UserProfile records. Reports come from the report cache in this
+    process; PDF rendering, which is CPU-bound, is spread over a process pool and each
+    result is written into the archive as soon as it completes.
+    Returns the number of group reports exported.
+    """
+    tasks = []
+    for username, user in users.items():
+        reports = get_group_reports(username, user.analyses, model, encoder, plans)
+        tasks.extend((username, index, report) for index, report in enumerate(reports))
+
+    total = len(tasks)
+    if progress_callback:
+        progress_callback(0, total)
+
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        if not tasks:
+            return 0
+
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=POOL_CONTEXT) as executor:
+            # Futures are not kept around, so rendered files can be freed once written
+            futures = as_completed({executor.submit(_render_group_files, task) for task in tasks})
+            for done, future in enumerate(futures, start=1):
+                for name, data in future.result():
+                    archive.writestr(name, data)
+                if progress_callback:
+                    progress_callback(done, total)
+
+    return total
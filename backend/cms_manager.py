@@ -1,23 +1,108 @@
 import json
 import os
+import copy
+import time
+import threading
+from types import MappingProxyType
+from contextlib import contextmanager
 from datetime import datetime
 
-# CMS content file
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialized between threads of one process
+    fcntl = None
+
+# CMS content file: the latest version, materialized
 CMS_CONTENT_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'cms_content.json')
 
+# Version history: one line per version with only the home content fields it changed
+# (version 0 holds every field)
+CMS_HISTORY_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'cms_history.jsonl')
+
+# Held while a version is committed, so saves from several processes do not interleave
+CMS_LOCK_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'cms_content.lock')
+
+# Seconds a process trusts its cached content before checking for saves by other processes
+VERSION_CHECK_INTERVAL = 2.0
+
+_lock = threading.Lock()
+_cache = {
+    "file_state": None,  # (mtime_ns, size) of the content file the cache was read from
+    "checked_at": None,  # monotonic time of the last check
+    "version": None,     # CMS version counter of the cached content
+    "content": None,     # latest content, shared by every reader
+    "home_view": None    # read-only view of the latest home content
+}
+
+@contextmanager
+def _commit_lock():
+    """Hold the commit lock, across processes where the platform allows"""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(CMS_LOCK_FILE), exist_ok=True)
+        with open(CMS_LOCK_FILE, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_only(value):
+    """Wrap a dict, and the dicts inside it, in read-only mapping proxies"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _read_only(item) for key, item in value.items()})
+    return value
+
+def _set_cached(state, content, now):
+    """Make content the cached latest version"""
+    _cache.update({
+        "file_state": state,
+        "checked_at": now,
+        "version": content.get("version", 0),
+        "content": content,
+        "home_view": _read_only(content["home_content"])
+    })
+
+def _content_file_state():
+    """Get the content file's (mtime_ns, size), None if it does not exist"""
+    try:
+        stat = os.stat(CMS_CONTENT_FILE)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+def _cached_content():
+    """Get the latest content, re-reading the file only after another process saved it"""
+    now = time.monotonic()
+    if _cache["content"] is not None and now - _cache["checked_at"] < VERSION_CHECK_INTERVAL:
+        return _cache["content"]
+
+    with _lock:
+        state = _content_file_state()
+        if _cache["content"] is None or state != _cache["file_state"]:
+            if state is None:
+                content = get_default_cms_content()
+            else:
+                with open(CMS_CONTENT_FILE, 'r', encoding='utf-8') as file:
+                    content = json.load(file)
+            _set_cached(state, content, now)
+        _cache["checked_at"] = now
+        return _cache["content"]
+
 def load_cms_content():
-    """Load CMS content from JSON file"""
-    os.makedirs(os.path.dirname(CMS_CONTENT_FILE), exist_ok=True)
-    if os.path.exists(CMS_CONTENT_FILE):
-        with open(CMS_CONTENT_FILE, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    return get_default_cms_content()
+    """Load CMS content (a copy the caller may modify)"""
+    return copy.deepcopy(_cached_content())
 
 def save_cms_content(content):
     """Save CMS content to JSON file"""
     os.makedirs(os.path.dirname(CMS_CONTENT_FILE), exist_ok=True)
-    with open(CMS_CONTENT_FILE, 'w', encoding='utf-8') as file:
+    tmp_file = f"{CMS_CONTENT_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
         json.dump(content, file, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, CMS_CONTENT_FILE)
+    _set_cached(_content_file_state(), content, time.monotonic())
 
 def get_default_cms_content():
     """Get default CMS content"""
@@ -32,37 +117,114 @@ def get_default_cms_content():
                 "address": "2nd Floor, Innovation Hub, Bhubaneswar, Odisha, India"
             }
         },
+        "version": 0,
         "last_updated": datetime.now().isoformat(),
         "updated_by": "system"
     }
 
+def _append_history(record):
+    """Append one version record to the history file"""
+    with open(CMS_HISTORY_FILE, 'ab') as file:
+        file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+
+def _ensure_history(content):
+    """Start the history with a full copy of the current content as its first version"""
+    if not os.path.exists(CMS_HISTORY_FILE):
+        _append_history({
+            "version": content.get("version", 0),
+            "updated_at": content.get("last_updated"),
+            "updated_by": content.get("updated_by"),
+            "changes": content["home_content"]
+        })
+
+def _commit(updates, updated_by, rollback_of=None):
+    """Save the fields that actually changed as a new version; returns the version number"""
+    with _commit_lock():
+        state = _content_file_state()
+        if state is None:
+            content = get_default_cms_content()
+        else:
+            with open(CMS_CONTENT_FILE, 'r', encoding='utf-8') as file:
+                content = json.load(file)
+        _ensure_history(content)
+
+        changes = {field: value for field, value in updates.items() if content["home_content"].get(field) != value}
+        if not changes:
+            return content.get("version", 0)
+
+        content["home_content"].update(changes)
+        content["version"] = content.get("version", 0) + 1
+        content["last_updated"] = datetime.now().isoformat()
+        content["updated_by"] = updated_by
+
+        record = {
+            "version": content["version"],
+            "updated_at": content["last_updated"],
+            "updated_by": updated_by,
+            "changes": changes
+        }
+        if rollback_of is not None:
+            record["rollback_of"] = rollback_of
+        _append_history(record)
+        save_cms_content(content)
+        return content["version"]
+
 def update_home_content(updates, updated_by="admin"):
     """Update home page content"""
-    content = load_cms_content()
-    content["home_content"].update(updates)
-    content["last_updated"] = datetime.now().isoformat()
-    content["updated_by"] = updated_by
-    save_cms_content(content)
+    _commit(updates, updated_by)
     return True
 
 def get_home_content():
-    """Get current home page content"""
-    return load_cms_content()["home_content"]
+    """Get current home page content as a read-only view shared by every reader"""
+    _cached_content()
+    return _cache["home_view"]
+
+def get_cms_version():
+    """Get the version counter of the current content"""
+    _cached_content()
+    return _cache["version"]
 
 def get_cms_metadata():
     """Get CMS metadata (last updated, etc.)"""
-    content = load_cms_content()
+    content = _cached_content()
     return {
+        "version": content.get("version", 0),
         "last_updated": content.get("last_updated"),
         "updated_by": content.get("updated_by")
     }
 
+def get_cms_history():
+    """Get every version record, newest first"""
+    if not os.path.exists(CMS_HISTORY_FILE):
+        return []
+    with open(CMS_HISTORY_FILE, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.endswith("\n")][::-1]
+
+def get_home_content_at(version):
+    """Rebuild the home page content as it was at a version, None if there is no such version"""
+    home_content = None
+    for record in reversed(get_cms_history()):
+        if record["version"] > version:
+            break
+        home_content = dict(home_content or {}, **record["changes"])
+    return home_content
+
+def rollback_home_content(version, updated_by="admin"):
+    """Restore the home page content of an earlier version, saved as a new version"""
+    home_content = get_home_content_at(version)
+    if home_content is None:
+        return False
+    _commit(home_content, updated_by, rollback_of=version)
+    return True
+
 # Initialize default content if not exists
 def initialize_cms():
     """Initialize CMS with default content if not exists"""
     if not os.path.exists(CMS_CONTENT_FILE):
         save_cms_content(get_default_cms_content())
         print("CMS content initialized with default values")
+    if not os.path.exists(CMS_HISTORY_FILE):
+        _ensure_history(load_cms_content())
 
 # Call initialization
 initialize_cms()
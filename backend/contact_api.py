@@ -1,29 +1,249 @@
 import json
 import os
+import re
 import uuid
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
 from datetime import datetime
 
-# Contact messages file
+try:
+    import fcntl
+except ImportError:  # Windows: the log is only shared between threads of one process
+    fcntl = None
+
+from backend.notifications import notify_contact_message
+
+# Contact messages: an append-only log (one JSON message per line) plus a journal of status changes
+CONTACT_LOG_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'contacts.jsonl')
+CONTACT_JOURNAL_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'contacts_status.jsonl')
+
+# Held while the log or journal is read or written, so compaction by one process
+# cannot drop a message another process is appending
+CONTACT_LOCK_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'contacts.lock')
+
+# Inverted index (token -> message ordinals) over name, email, subject and message body
+CONTACT_SEARCH_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'contacts_search.json')
+
+# Newly indexed messages kept only in memory before the search index is saved again
+SEARCH_SAVE_EVERY = 500
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Journal size at which status changes are folded back into the log
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+# Legacy single-array store, migrated into the log on first start and kept as a backup
 CONTACT_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'contacts.json')
+CONTACT_BACKUP_FILE = f"{CONTACT_FILE}.bak"
+
+_lock = threading.Lock()
+_inbox = {
+    "files": None,      # (log inode, journal inode) the index was built from
+    "log_size": 0,      # bytes of the log already indexed
+    "journal_size": 0,  # bytes of the journal already applied
+    "offsets": {},      # message id -> byte offset of its line in the log
+    "order": [],        # message ids in arrival order
+    "ordinals": {},     # message id -> position in "order"
+    "status": {},       # message id -> current status
+    "by_status": {},    # status -> ascending ordinals of the messages with that status
+    "updated_at": {}    # message id -> last status change
+}
+_search = {
+    "covered": 0,       # bytes of the log whose messages are in the postings
+    "postings": {},     # token -> ascending message ordinals (positions in _inbox["order"])
+    "tokens": [],       # vocabulary for prefix lookups; new tokens are appended unsorted
+    "sorted": True,     # whether "tokens" is currently sorted
+    "unsaved": 0        # messages indexed since the index was last saved
+}
+
+@contextmanager
+def _inbox_lock():
+    """Hold the inbox lock, across processes where the platform allows"""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(CONTACT_LOCK_FILE), exist_ok=True)
+        with open(CONTACT_LOCK_FILE, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _file_state(path):
+    """Get a file's (inode, size), (None, 0) if it does not exist"""
+    try:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_size
+    except OSError:
+        return None, 0
+
+def _set_status(message_id, status, updated_at=None):
+    """Record a message status in the index, keeping the per-status ordinal lists in step"""
+    ordinal = _inbox["ordinals"][message_id]
+    previous = _inbox["status"].get(message_id)
+    if previous != status:
+        if previous is not None:
+            ordinals = _inbox["by_status"][previous]
+            del ordinals[bisect_left(ordinals, ordinal)]
+        insort(_inbox["by_status"].setdefault(status, []), ordinal)
+    _inbox["status"][message_id] = status
+    if updated_at:
+        _inbox["updated_at"][message_id] = updated_at
+
+def tokenize(text):
+    """Split text into lower-cased search tokens"""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+def _message_tokens(message):
+    """Get the distinct search tokens of a message (the full email address included)"""
+    tokens = set()
+    for field in ("name", "email", "subject", "message"):
+        tokens.update(tokenize(message.get(field)))
+    if message.get("email"):
+        tokens.add(message["email"].strip().lower())
+    return tokens
+
+def _index_message(ordinal, message):
+    """Add a message to the inverted index"""
+    postings = _search["postings"]
+    for token in _message_tokens(message):
+        if token not in postings:
+            postings[token] = []
+            _search["tokens"].append(token)
+            _search["sorted"] = False
+        postings[token].append(ordinal)
+    _search["unsaved"] += 1
+
+def _load_search_index(log_ino):
+    """Load the saved inverted index if it was built from the current log file"""
+    _search.update({"covered": 0, "postings": {}, "tokens": [], "sorted": True, "unsaved": 0})
+    try:
+        with open(CONTACT_SEARCH_FILE, 'r', encoding='utf-8') as file:
+            saved = json.load(file)
+    except (OSError, ValueError):
+        return
+    if saved.get("log_ino") == log_ino:
+        _search.update({
+            "covered": saved["covered"],
+            "postings": saved["postings"],
+            "tokens": sorted(saved["postings"]),
+            "sorted": True
+        })
+
+def _save_search_index():
+    """Save the inverted index next to the contacts log"""
+    tmp_file = f"{CONTACT_SEARCH_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump({
+            "log_ino": _inbox["files"][0],
+            "covered": _search["covered"],
+            "postings": _search["postings"]
+        }, file, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_file, CONTACT_SEARCH_FILE)
+    _search["unsaved"] = 0
+
+def _reset_index():
+    """Forget everything indexed so far"""
+    _inbox.update({
+        "files": None,
+        "log_size": 0,
+        "journal_size": 0,
+        "offsets": {},
+        "order": [],
+        "ordinals": {},
+        "status": {},
+        "by_status": {},
+        "updated_at": {}
+    })
+
+def _refresh_index():
+    """Index log lines and apply journal entries appended since the last refresh
+
+    Only the new tail of each file is read, so this is O(new entries). Compaction
+    replaces both files, so a changed inode means the index is rebuilt from scratch.
+    """
+    log_ino, log_size = _file_state(CONTACT_LOG_FILE)
+    journal_ino, journal_size = _file_state(CONTACT_JOURNAL_FILE)
+    if _inbox["files"] != (log_ino, journal_ino):
+        search_valid = _inbox["files"] is not None and _inbox["files"][0] == log_ino
+        _reset_index()
+        _inbox["files"] = (log_ino, journal_ino)
+        if not search_valid:
+            _load_search_index(log_ino)
+
+    if log_size > _inbox["log_size"]:
+        with open(CONTACT_LOG_FILE, 'rb') as file:
+            file.seek(_inbox["log_size"])
+            offset = _inbox["log_size"]
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # Partially written line; picked up on the next refresh
+                message = json.loads(line)
+                if message["id"] not in _inbox["offsets"]:
+                    if offset >= _search["covered"]:
+                        _index_message(len(_inbox["order"]), message)
+                    _inbox["ordinals"][message["id"]] = len(_inbox["order"])
+                    _inbox["order"].append(message["id"])
+                _inbox["offsets"][message["id"]] = offset
+                _set_status(message["id"], message.get("status", "unread"), message.get("updated_at"))
+                offset += len(line)
+            _inbox["log_size"] = offset
+            _search["covered"] = max(_search["covered"], offset)
+            if _search["unsaved"] >= SEARCH_SAVE_EVERY:
+                _save_search_index()
+
+    if journal_size > _inbox["journal_size"]:
+        with open(CONTACT_JOURNAL_FILE, 'rb') as file:
+            file.seek(_inbox["journal_size"])
+            offset = _inbox["journal_size"]
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                change = json.loads(line)
+                if change["id"] in _inbox["offsets"]:
+                    _set_status(change["id"], change["status"], change.get("updated_at"))
+                offset += len(line)
+            _inbox["journal_size"] = offset
+
+        # Status changes are folded into the log once the journal grows large
+        if _inbox["journal_size"] >= JOURNAL_COMPACT_BYTES:
+            _compact()
+
+def _append_line(path, record):
+    """Append one JSON record as a single line"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as file:
+        file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+
+def _read_messages(message_ids):
+    """Read messages from their log offsets through one file handle and apply their current status"""
+    messages = []
+    with open(CONTACT_LOG_FILE, 'rb') as file:
+        position = None
+        for message_id in message_ids:
+            offset = _inbox["offsets"][message_id]
+            if offset != position:
+                file.seek(offset)
+            line = file.readline()
+            position = offset + len(line)
+            message = json.loads(line)
+            message["status"] = _inbox["status"][message_id]
+            if message_id in _inbox["updated_at"]:
+                message["updated_at"] = _inbox["updated_at"][message_id]
+            messages.append(message)
+    return messages
 
 def load_contact_messages():
-    """Load contact messages from JSON file"""
-    os.makedirs(os.path.dirname(CONTACT_FILE), exist_ok=True)
-    if os.path.exists(CONTACT_FILE):
-        with open(CONTACT_FILE, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    return []
-
-def save_contact_messages(messages):
-    """Save contact messages to JSON file"""
-    os.makedirs(os.path.dirname(CONTACT_FILE), exist_ok=True)
-    with open(CONTACT_FILE, 'w', encoding='utf-8') as file:
-        json.dump(messages, file, indent=2, ensure_ascii=False)
+    """Load every contact message (with current status) in arrival order"""
+    with _inbox_lock():
+        _refresh_index()
+        return _read_messages(_inbox["order"])
 
 def save_contact_message(name, email, message):
     """Save a new contact message"""
-    messages = load_contact_messages()
-
     new_message = {
         "id": str(uuid.uuid4()),
         "name": name,
@@ -33,39 +253,150 @@ def save_contact_message(name, email, message):
         "status": "unread"
     }
 
-    messages.append(new_message)
-    save_contact_messages(messages)
+    with _inbox_lock():
+        _append_line(CONTACT_LOG_FILE, new_message)
+        _refresh_index()
+
+    # Staff are notified by the background worker, not while the visitor waits
+    notify_contact_message(new_message)
     return True
 
 def get_contact_message(message_id):
     """Get a specific contact message by ID"""
-    messages = load_contact_messages()
-    for message in messages:
-        if message.get("id") == message_id:
-            return message
-    return None
+    with _inbox_lock():
+        _refresh_index()
+        if message_id not in _inbox["offsets"]:
+            return None
+        return _read_messages([message_id])[0]
+
+def list_contact_messages(offset=0, limit=10, status=None, newest_first=True):
+    """Get one page of contact messages, optionally only those with a given status
+
+    Returns (messages, total matching). Only the messages on the page are read from the log.
+    """
+    with _inbox_lock():
+        _refresh_index()
+        order = _inbox["order"]
+        ordinals = _inbox["by_status"].get(status, []) if status else range(len(order))
+
+        total = len(ordinals)
+        end = total if limit is None else min(total, offset + limit)
+        if newest_first:
+            page = ordinals[max(0, total - end):max(0, total - offset)][::-1]
+        else:
+            page = ordinals[offset:end]
+        return _read_messages([order[i] for i in page]), total
+
+def _match_prefix(term):
+    """Get the ordinals of messages with a token starting with `term`"""
+    tokens = _search["tokens"]
+    if not _search["sorted"]:
+        tokens.sort()  # Sorted prefix plus a short unsorted tail: nearly linear for Timsort
+        _search["sorted"] = True
+    matches = set()
+    for i in range(bisect_left(tokens, term), len(tokens)):
+        if not tokens[i].startswith(term):
+            break
+        matches.update(_search["postings"][tokens[i]])
+    return matches
+
+def _has_ordinal(ordinals, ordinal):
+    """Check whether an ascending ordinal list holds an ordinal"""
+    i = bisect_left(ordinals, ordinal)
+    return i < len(ordinals) and ordinals[i] == ordinal
+
+def search_contact_messages(query, offset=0, limit=10, status=None):
+    """Search messages by name, email, subject or body, newest first
+
+    Every query term is matched as a token prefix and all terms must match.
+    Returns (messages, total matching); only the page is read from the log.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return list_contact_messages(offset, limit, status)
+
+    with _inbox_lock():
+        _refresh_index()
+        matches = None
+        for term in sorted(set(terms), key=len, reverse=True):  # Longer terms narrow the set fastest
+            found = _match_prefix(term)
+            matches = found if matches is None else matches & found
+            if not matches:
+                break
+
+        order = _inbox["order"]
+        ordinals = sorted(matches or (), reverse=True)
+        if status:
+            with_status = _inbox["by_status"].get(status, [])
+            ordinals = [i for i in ordinals if _has_ordinal(with_status, i)]
+        page = ordinals[offset:] if limit is None else ordinals[offset:offset + limit]
+        return _read_messages([order[i] for i in page]), len(ordinals)
 
 def update_message_status(message_id, status):
     """Update message status (read/unread)"""
-    messages = load_contact_messages()
-    for message in messages:
-        if message.get("id") == message_id:
-            message["status"] = status
-            message["updated_at"] = datetime.now().isoformat()
-            save_contact_messages(messages)
-            return True
-    return False
+    with _inbox_lock():
+        _refresh_index()
+        if message_id not in _inbox["offsets"]:
+            return False
+        updated_at = datetime.now().isoformat()
+        _append_line(CONTACT_JOURNAL_FILE, {"id": message_id, "status": status, "updated_at": updated_at})
+        _refresh_index()
+    return True
 
 def get_unread_count():
     """Get count of unread messages"""
-    messages = load_contact_messages()
-    return len([m for m in messages if m.get("status") == "unread"])
+    with _inbox_lock():
+        _refresh_index()
+        return len(_inbox["by_status"].get("unread", []))
+
+def _compact():
+    """Rewrite the log with current statuses and start an empty journal (index must be fresh)"""
+    messages = _read_messages(_inbox["order"])
+    tmp_file = f"{CONTACT_LOG_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as file:
+        for message in messages:
+            file.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n")
+    os.replace(tmp_file, CONTACT_LOG_FILE)
+    # Replaying the old journal over the compacted log is harmless, so a crash here loses nothing
+    tmp_file = f"{CONTACT_JOURNAL_FILE}.{os.getpid()}.tmp"
+    open(tmp_file, 'wb').close()
+    os.replace(tmp_file, CONTACT_JOURNAL_FILE)
+    _reset_index()
+    _refresh_index()
+    _save_search_index()
+
+def compact_contacts():
+    """Fold the status journal into the log and start a new, empty journal"""
+    with _inbox_lock():
+        _refresh_index()
+        _compact()
 
 # Initialize empty contacts file if not exists
 def initialize_contacts():
-    """Initialize contacts file if not exists"""
-    if not os.path.exists(CONTACT_FILE):
-        save_contact_messages([])
+    """Initialize the contacts log, migrating the legacy JSON array if present"""
+    os.makedirs(os.path.dirname(CONTACT_LOG_FILE), exist_ok=True)
+    if not os.path.exists(CONTACT_JOURNAL_FILE):
+        open(CONTACT_JOURNAL_FILE, 'ab').close()
+    with _inbox_lock():
+        if os.path.exists(CONTACT_LOG_FILE):
+            return
+
+        messages = []
+        if os.path.exists(CONTACT_FILE):
+            with open(CONTACT_FILE, 'r', encoding='utf-8') as file:
+                messages = json.load(file)
+
+        tmp_file = f"{CONTACT_LOG_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as file:
+            for message in messages:
+                file.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n")
+        os.replace(tmp_file, CONTACT_LOG_FILE)
+
+        if os.path.exists(CONTACT_FILE):
+            os.replace(CONTACT_FILE, CONTACT_BACKUP_FILE)
+    if messages:
+        print(f"Migrated {len(messages)} contact messages to {os.path.basename(CONTACT_LOG_FILE)}")
+    else:
         print("Contacts file initialized")
 
 # Call initialization
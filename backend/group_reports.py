@@ -0,0 +1,184 @@
+import numpy as np
+import os
+import json
+import hashlib
+
+from backend.analysis_columns import FEATURES, get_analysis_columns
+
+# Analyses per group report
+GROUP_SIZE = 5
+
+# Model artifacts a cached report depends on
+BACKEND_DIR = os.path.dirname(__file__)
+MODEL_FILES = [
+    os.path.join(BACKEND_DIR, 'crop_model.pkl'),
+    os.path.join(BACKEND_DIR, 'label_encoder.pkl'),
+    os.path.join(BACKEND_DIR, 'implementation_plans_expanded.json')
+]
+
+# Completed group reports, one JSON file per user
+REPORT_CACHE_DIR = os.path.join(BACKEND_DIR, '..', 'data', 'report_cache')
+
+def decode_predictions(predictions, encoder):
+    """Map encoded model predictions to crop names with one array lookup"""
+    predictions = np.asarray(predictions)
+    if predictions.dtype.kind in 'iu':
+        return encoder.classes_[predictions]
+    return predictions
+
+def select_group_plan(crop_info, analyses_group):
+    """Pick the implementation plan variant for a group"""
+    variants = list(crop_info.get('variants', {}).keys())
+    if not variants:
+        return None
+
+    # Use the commonly selected variant if every analysis in the group agrees
+    selected_variants = [a.selected_variant for a in analyses_group if a.selected_variant]
+    if selected_variants and len(set(selected_variants)) == 1 and selected_variants[0] in variants:
+        return crop_info['variants'][selected_variants[0]]
+
+    # Use first variant as default
+    return crop_info['variants'][variants[0]]
+
+def generate_group_reports(analyses, model, encoder, plans, group_size=GROUP_SIZE, features=None):
+    """Generate reports for every complete group of analyses with one batched prediction
+
+    `features` may carry the (n, 7) soil feature matrix of `analyses` when the caller
+    already has it in columnar form.
+    """
+    n_groups = len(analyses) // group_size
+    if n_groups == 0:
+        return []
+
+    complete = analyses[:n_groups * group_size]
+    if features is None:
+        # The float32 values the column store holds, so both paths average the same numbers
+        features = np.array([[getattr(a, f) for f in FEATURES] for a in complete], dtype=np.float32)
+
+    # Average every group at once (in float64): (n_groups * size, 7) -> (n_groups, size, 7) -> (n_groups, 7)
+    features = np.asarray(features[:n_groups * group_size], dtype=np.float64)
+    averages = features.reshape(n_groups, group_size, len(FEATURES)).mean(axis=1)
+
+    predicted_crops = decode_predictions(model.predict(averages), encoder)
+
+    reports = []
+    for i in range(n_groups):
+        analyses_group = complete[i * group_size:(i + 1) * group_size]
+        predicted_crop = str(predicted_crops[i])
+        plan = select_group_plan(plans.get(predicted_crop, {}), analyses_group)
+
+        # Get date range
+        dates = [a.timestamp for a in analyses_group]
+        start_date = min(dates).strftime('%Y-%m-%d')
+        end_date = max(dates).strftime('%Y-%m-%d')
+
+        reports.append({
+            'group_id': f"Group {len(analyses_group)} analyses ({start_date} to {end_date})",
+            'predicted_crop': predicted_crop,
+            'avg_parameters': {f: float(v) for f, v in zip(FEATURES, averages[i])},
+            'plan': plan,
+            'analyses_count': len(analyses_group)
+        })
+
+    return reports
+
+def group_report_filename(report, extension):
+    """Build the download file name for a group report"""
+    slug = report['group_id'].replace(' ', '_').replace('(', '').replace(')', '').replace('-', '_')
+    return f"group_report_{slug}.{extension}"
+
+def group_report_csv_row(report):
+    """Flatten a group report into a CSV row"""
+    return {
+        'Group ID': report['group_id'],
+        'Predicted Crop': report['predicted_crop'],
+        'Analyses Count': report['analyses_count'],
+        'Avg Nitrogen (ppm)': report['avg_parameters']['nitrogen'],
+        'Avg Phosphorus (ppm)': report['avg_parameters']['phosphorus'],
+        'Avg Potassium (ppm)': report['avg_parameters']['potassium'],
+        'Avg pH': report['avg_parameters']['ph'],
+        'Avg Temperature (°C)': report['avg_parameters']['temperature'],
+        'Avg Humidity (%)': report['avg_parameters']['humidity'],
+        'Avg Rainfall (cm)': report['avg_parameters']['rainfall']
+    }
+
+def get_model_version():
+    """Identify the current model/encoder/plans files by size and modification time"""
+    parts = []
+    for path in MODEL_FILES:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+        except OSError:
+            parts.append("missing")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+def _report_cache_file(username):
+    """Get the report cache file for a user"""
+    name = hashlib.sha256(username.encode()).hexdigest()[:32]
+    return os.path.join(REPORT_CACHE_DIR, f"{name}.json")
+
+def load_report_cache(username):
+    """Load cached group reports for a user"""
+    cache_file = _report_cache_file(username)
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+def save_report_cache(username, cache):
+    """Save cached group reports for a user"""
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    cache_file = _report_cache_file(username)
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump(cache, file, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+
+def get_group_reports(username, analyses, model, encoder, plans, group_size=GROUP_SIZE):
+    """Get group reports for a user, computing only groups missing from the cache
+
+    Cache entries are keyed on user, group index, model version and the group's first
+    and last timestamps. The history is append-only, so that identifies a completed
+    group without hashing its analyses; a group is recomputed only if the model
+    changes or the history no longer lines up with the cache.
+    """
+    model_version = get_model_version()
+    cache = load_report_cache(username)
+    if cache.get('model_version') != model_version or cache.get('group_size') != group_size:
+        cache = {'model_version': model_version, 'group_size': group_size, 'groups': {}}
+
+    n_groups = len(analyses) // group_size
+    columns = get_analysis_columns(username, analyses)
+    bounds = columns.timestamps[:n_groups * group_size].reshape(n_groups, group_size)[:, [0, -1]].tolist()
+
+    reports = [None] * n_groups
+    missing = []
+    for i in range(n_groups):
+        entry = cache['groups'].get(str(i))
+        if entry and entry.get('key') == bounds[i]:
+            reports[i] = entry['report']
+        else:
+            missing.append(i)
+
+    stale = [key for key in cache['groups'] if int(key) >= n_groups]
+    if missing or stale:
+        for key in stale:
+            del cache['groups'][key]
+
+        if missing:
+            batch = []
+            for i in missing:
+                batch.extend(analyses[i * group_size:(i + 1) * group_size])
+            rows = np.concatenate([np.arange(i * group_size, (i + 1) * group_size) for i in missing])
+            new_reports = generate_group_reports(batch, model, encoder, plans, group_size, columns.features[rows])
+            for i, report in zip(missing, new_reports):
+                reports[i] = report
+                cache['groups'][str(i)] = {'key': bounds[i], 'report': report}
+
+        save_report_cache(username, cache)
+
+    return reports
@@ -1,78 +1,314 @@
-import json
 import os
+import re
+import csv
+import json
+import threading
+from itertools import islice
+from io import BytesIO, StringIO, TextIOBase, TextIOWrapper
 from datetime import datetime
 
-# Newsletter subscribers file
+# Newsletter subscribers: a compacted snapshot plus an append-only log of mutations since
 NEWSLETTER_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'newsletter.json')
+NEWSLETTER_LOG_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'newsletter_log.jsonl')
 
-def load_subscribers():
-    """Load newsletter subscribers from JSON file"""
-    os.makedirs(os.path.dirname(NEWSLETTER_FILE), exist_ok=True)
-    if os.path.exists(NEWSLETTER_FILE):
-        with open(NEWSLETTER_FILE, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    return []
+# Mutations logged before the snapshot is rewritten
+COMPACT_EVERY = 1000
 
-def save_subscribers(subscribers):
-    """Save newsletter subscribers to JSON file"""
+# Columns of the subscriber CSV export; imports need only `email`
+EXPORT_COLUMNS = ["Email", "Subscribed At", "Status"]
+
+# Rows formatted per chunk of a streamed export
+EXPORT_CHUNK_ROWS = 5000
+
+_lock = threading.Lock()
+_store = {
+    "files": None,     # (snapshot inode, log inode) the index was built from
+    "log_size": 0,     # bytes of the log already applied
+    "log_records": 0,  # mutations in the log, for scheduling compaction
+    "subscribers": {}, # normalized email -> subscriber record, in subscription order
+    "active": 0        # maintained count of active subscribers
+}
+
+# Whitespace or control characters inside an address (a CR/LF would inject SMTP commands or headers)
+INVALID_EMAIL_CHARS = re.compile(r"[\s\x00-\x1f\x7f]")
+
+def normalize_email(email):
+    """Normalize an email address for duplicate checks"""
+    return (email or "").strip().lower()
+
+def is_valid_email(email):
+    """Check that an address has an '@' and no whitespace or control characters"""
+    key = normalize_email(email)
+    return "@" in key and not INVALID_EMAIL_CHARS.search(key)
+
+def _file_state(path):
+    """Get a file's (inode, size), (None, 0) if it does not exist"""
+    try:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_size
+    except OSError:
+        return None, 0
+
+def _put(record):
+    """Insert or replace a subscriber record, keeping the active counter in step"""
+    key = normalize_email(record.get("email"))
+    previous = _store["subscribers"].get(key)
+    if previous is not None and previous.get("status") == "active":
+        _store["active"] -= 1
+    _store["subscribers"][key] = record
+    if record.get("status") == "active":
+        _store["active"] += 1
+
+def _drop(key):
+    """Remove a subscriber record, keeping the active counter in step"""
+    previous = _store["subscribers"].pop(key, None)
+    if previous is not None and previous.get("status") == "active":
+        _store["active"] -= 1
+
+def _apply(mutation):
+    """Apply one logged mutation (replaying a mutation twice is harmless)"""
+    key = normalize_email(mutation.get("email"))
+    op = mutation.get("op")
+    if op == "add":
+        _put({field: value for field, value in mutation.items() if field != "op"})
+    elif op == "remove":
+        _drop(key)
+    elif op == "status" and key in _store["subscribers"]:
+        record = dict(_store["subscribers"][key])
+        record["status"] = mutation["status"]
+        record["updated_at"] = mutation["updated_at"]
+        _put(record)
+
+def _refresh():
+    """Load the snapshot and replay log mutations appended since the last refresh"""
+    snapshot_ino, _ = _file_state(NEWSLETTER_FILE)
+    log_ino, log_size = _file_state(NEWSLETTER_LOG_FILE)
+    if _store["files"] != (snapshot_ino, log_ino):
+        _store.update({"files": (snapshot_ino, log_ino), "log_size": 0, "log_records": 0, "subscribers": {}, "active": 0})
+        if snapshot_ino is not None:
+            with open(NEWSLETTER_FILE, 'r', encoding='utf-8') as file:
+                for record in json.load(file):
+                    _put(record)
+
+    if log_size > _store["log_size"]:
+        with open(NEWSLETTER_LOG_FILE, 'rb') as file:
+            file.seek(_store["log_size"])
+            offset = _store["log_size"]
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # Partially written line; picked up on the next refresh
+                _apply(json.loads(line))
+                _store["log_records"] += 1
+                offset += len(line)
+            _store["log_size"] = offset
+
+def _write_snapshot(subscribers):
+    """Write a new snapshot and start an empty log"""
     os.makedirs(os.path.dirname(NEWSLETTER_FILE), exist_ok=True)
-    with open(NEWSLETTER_FILE, 'w', encoding='utf-8') as file:
+    tmp_file = f"{NEWSLETTER_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
         json.dump(subscribers, file, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, NEWSLETTER_FILE)
+    # Replaying the old log over the new snapshot is harmless, so a crash here loses nothing
+    tmp_file = f"{NEWSLETTER_LOG_FILE}.{os.getpid()}.tmp"
+    open(tmp_file, 'wb').close()
+    os.replace(tmp_file, NEWSLETTER_LOG_FILE)
+
+def _log(mutation):
+    """Append a mutation to the log, apply it, and compact once the log is long"""
+    with open(NEWSLETTER_LOG_FILE, 'ab') as file:
+        file.write(json.dumps(mutation, ensure_ascii=False).encode('utf-8') + b"\n")
+    _refresh()
+    if _store["log_records"] >= COMPACT_EVERY:
+        _write_snapshot(list(_store["subscribers"].values()))
+        _refresh()
+
+def _log_batch(mutations):
+    """Apply many mutations with a single write
+
+    Small batches are appended to the log in one write; batches that would fill
+    the log go straight into a new snapshot instead.
+    """
+    if not mutations:
+        return
+    if _store["log_records"] + len(mutations) < COMPACT_EVERY:
+        with open(NEWSLETTER_LOG_FILE, 'ab') as file:
+            file.write(b"".join(json.dumps(m, ensure_ascii=False).encode('utf-8') + b"\n" for m in mutations))
+        _refresh()
+    else:
+        for mutation in mutations:
+            _apply(mutation)
+        _write_snapshot(list(_store["subscribers"].values()))
+        _refresh()
+
+def load_subscribers():
+    """Load newsletter subscribers in subscription order"""
+    with _lock:
+        _refresh()
+        return list(_store["subscribers"].values())
+
+def save_subscribers(subscribers):
+    """Replace the whole subscriber list"""
+    with _lock:
+        _write_snapshot(subscribers)
+        _refresh()
+
+def list_subscribers(offset=0, limit=50, newest_first=True):
+    """Get one page of subscribers
+
+    Returns (subscribers, total).
+    """
+    with _lock:
+        _refresh()
+        subscribers = _store["subscribers"].values()
+        if newest_first:
+            subscribers = reversed(subscribers)
+        end = None if limit is None else offset + limit
+        return list(islice(subscribers, offset, end)), len(_store["subscribers"])
+
+def compact_newsletter():
+    """Fold the mutation log into a new snapshot"""
+    with _lock:
+        _refresh()
+        _write_snapshot(list(_store["subscribers"].values()))
+        _refresh()
+
+def get_subscriber(email):
+    """Get a subscriber record by email"""
+    with _lock:
+        _refresh()
+        return _store["subscribers"].get(normalize_email(email))
 
 def add_subscriber(email):
     """Add a new subscriber to the newsletter"""
-    if not email or "@" not in email:
+    if not is_valid_email(email):
         return False
-    
-    subscribers = load_subscribers()
-    
-    # Check if already subscribed
-    for subscriber in subscribers:
-        if subscriber.get("email", "").lower() == email.lower():
+
+    with _lock:
+        _refresh()
+
+        # Check if already subscribed
+        key = normalize_email(email)
+        if key in _store["subscribers"]:
             return False
-    
-    new_subscriber = {
-        "email": email.lower(),
-        "subscribed_at": datetime.now().isoformat(),
-        "status": "active"
-    }
-    
-    subscribers.append(new_subscriber)
-    save_subscribers(subscribers)
+
+        _log({
+            "op": "add",
+            "email": key,
+            "subscribed_at": datetime.now().isoformat(),
+            "status": "active"
+        })
     return True
 
 def remove_subscriber(email):
     """Remove a subscriber from the newsletter"""
-    subscribers = load_subscribers()
-    updated_subscribers = [s for s in subscribers if s.get("email", "").lower() != email.lower()]
-    
-    if len(updated_subscribers) < len(subscribers):
-        save_subscribers(updated_subscribers)
-        return True
-    return False
+    with _lock:
+        _refresh()
+        key = normalize_email(email)
+        if key not in _store["subscribers"]:
+            return False
+        _log({"op": "remove", "email": key})
+    return True
 
 def get_subscriber_count():
     """Get total number of active subscribers"""
-    subscribers = load_subscribers()
-    return len([s for s in subscribers if s.get("status") == "active"])
+    with _lock:
+        _refresh()
+        return _store["active"]
 
 def update_subscriber_status(email, status):
     """Update subscriber status (active/unsubscribed)"""
-    subscribers = load_subscribers()
-    for subscriber in subscribers:
-        if subscriber.get("email", "").lower() == email.lower():
-            subscriber["status"] = status
-            subscriber["updated_at"] = datetime.now().isoformat()
-            save_subscribers(subscribers)
-            return True
-    return False
+    with _lock:
+        _refresh()
+        key = normalize_email(email)
+        if key not in _store["subscribers"]:
+            return False
+        _log({"op": "status", "email": key, "status": status, "updated_at": datetime.now().isoformat()})
+    return True
+
+def import_subscribers_csv(file):
+    """Import subscribers from a CSV file with an `email` column
+
+    The file (binary or text) is streamed row by row, deduplicated against the
+    existing subscribers and earlier rows, and saved with a single write.
+    Returns (number of subscribers added, list of {'row', 'email', 'message'} errors).
+    """
+    if not isinstance(file, TextIOBase):
+        file = TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(file)
+    try:
+        reader.fieldnames = [f.strip().lower() for f in reader.fieldnames or []]
+    except UnicodeDecodeError:
+        return 0, [{'row': 1, 'email': None, 'message': "File is not UTF-8 encoded; save it as CSV UTF-8 and try again"}]
+    if 'email' not in reader.fieldnames:
+        return 0, [{'row': 1, 'email': None, 'message': "Missing columns: email"}]
+
+    subscribed_at = datetime.now().isoformat()
+    mutations = []
+    errors = []
+    with _lock:
+        _refresh()
+        seen = set()
+        try:
+            for line, row in enumerate(reader, start=2):
+                email = (row.get('email') or '').strip()
+                key = normalize_email(email)
+                if not is_valid_email(key):
+                    errors.append({'row': line, 'email': email, 'message': "Invalid email address"})
+                elif key in _store["subscribers"]:
+                    errors.append({'row': line, 'email': email, 'message': "Already subscribed"})
+                elif key in seen:
+                    errors.append({'row': line, 'email': email, 'message': "Duplicate email in file"})
+                else:
+                    seen.add(key)
+                    mutations.append({"op": "add", "email": key, "subscribed_at": subscribed_at, "status": "active"})
+        except UnicodeDecodeError:
+            # Nothing is imported from a file that cannot be read to the end
+            return 0, errors + [{'row': None, 'email': None, 'message': "File is not UTF-8 encoded; save it as CSV UTF-8 and try again"}]
+        _log_batch(mutations)
+    return len(mutations), errors
+
+def iter_subscribers_csv(status=None):
+    """Yield the subscriber list as CSV text, a chunk of rows at a time"""
+    with _lock:
+        _refresh()
+        subscribers = list(_store["subscribers"].values())
+
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_COLUMNS)
+    for start in range(0, len(subscribers), EXPORT_CHUNK_ROWS):
+        writer.writerows(
+            [s.get("email"), s.get("subscribed_at", ""), s.get("status", "active").title()]
+            for s in subscribers[start:start + EXPORT_CHUNK_ROWS]
+            if status is None or s.get("status", "active") == status
+        )
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+    if output.tell():
+        yield output.getvalue()
+
+def export_subscribers_csv(status=None):
+    """Build the whole subscriber CSV in memory and return it as a rewound binary file
+
+    Streamlit needs the complete download at once, so this is not bounded in memory;
+    it only defers the work until the download is requested.
+    """
+    file = BytesIO()
+    for chunk in iter_subscribers_csv(status):
+        file.write(chunk.encode('utf-8'))
+    file.seek(0)
+    return file
 
 # Initialize empty newsletter file if not exists
 def initialize_newsletter():
-    """Initialize newsletter file if not exists"""
+    """Initialize newsletter files if not exists"""
     if not os.path.exists(NEWSLETTER_FILE):
         save_subscribers([])
         print("Newsletter file initialized")
+    elif not os.path.exists(NEWSLETTER_LOG_FILE):
+        open(NEWSLETTER_LOG_FILE, 'ab').close()
 
 # Call initialization
 initialize_newsletter()
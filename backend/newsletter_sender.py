@@ -0,0 +1,343 @@
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import smtplib
+import threading
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formatdate
+from email import policy
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from backend.newsletter_api import load_subscribers, is_valid_email
+
+# Outgoing mail server; the defaults point at the local sink (python -m backend.smtp_sink)
+SMTP_HOST = os.environ.get('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '1025'))
+SMTP_USERNAME = os.environ.get('SMTP_USERNAME')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', '').lower() in ('1', 'true', 'yes')
+SMTP_TIMEOUT = 30
+SENDER_ADDRESS = os.environ.get('NEWSLETTER_SENDER', 'newsletter@smartsoil.local')
+
+# Delivery tuning
+POOL_SIZE = 4        # persistent SMTP connections, and delivery threads
+BATCH_SIZE = 50      # recipients sent per connection checkout
+MAX_RETRIES = 3      # further attempts after a temporary failure
+RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled for each one after
+
+# Per-recipient delivery status of every campaign, plus one summary line per campaign
+CAMPAIGN_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'campaigns')
+CAMPAIGN_INDEX_FILE = os.path.join(CAMPAIGN_DIR, 'campaigns.jsonl')
+
+class SMTPConnectionPool:
+    """Persistent SMTP connections shared by delivery threads
+
+    At most `size` connections are open at once; they are opened on first use
+    and reused for every later batch until the pool is closed. Once the server
+    refuses a new connection, `error` says why and senders stop.
+    """
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, size=POOL_SIZE, username=SMTP_USERNAME, password=SMTP_PASSWORD, use_tls=SMTP_USE_TLS, timeout=SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.error = None
+
+    def connect(self):
+        """Open and authenticate a new connection, marking the pool unavailable if that fails"""
+        connection = None
+        try:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password)
+            return connection
+        except (smtplib.SMTPException, OSError) as e:
+            if connection is not None:
+                _close(connection)
+            self.error = str(e) or type(e).__name__
+            raise
+
+    def acquire(self):
+        """Check out a connection, waiting while all of them are in use
+
+        Returns None (still holding the slot) if the pool is unavailable or a new
+        connection could not be opened.
+        """
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        if self.error is not None:
+            return None
+        try:
+            return self.connect()
+        except (smtplib.SMTPException, OSError):
+            return None
+
+    def release(self, connection):
+        """Return a checked-out connection (None if it was lost)"""
+        if connection is not None:
+            self._idle.put(connection)
+        self._slots.release()
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                _close(connection)
+
+def _close(connection):
+    """Close a connection without the QUIT handshake"""
+    try:
+        connection.close()
+    except OSError:
+        pass
+
+class _TextExtractor(HTMLParser):
+    """Collect the visible text of an HTML document, one line per block element"""
+
+    BLOCK_TAGS = {'br', 'p', 'div', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'table', 'ul', 'ol', 'hr'}
+    SKIP_TAGS = {'script', 'style', 'head', 'title'}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag == 'li':
+            self.parts.append("- ")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skipping = max(self.skipping - 1, 0)
+        elif tag in self.BLOCK_TAGS and tag != 'li':
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(re.sub(r"\s+", " ", data))
+
+def html_to_text(html_body):
+    """Derive the plain-text alternative of an HTML message"""
+    extractor = _TextExtractor()
+    extractor.feed(html_body)
+    extractor.close()
+    lines = [line.strip() for line in "".join(extractor.parts).splitlines()]
+    text = []
+    for line in lines:
+        if line or (text and text[-1]):
+            text.append(line)
+    return "\n".join(text).strip()
+
+def render_message(subject, text_body, html_body=None, sender=SENDER_ADDRESS):
+    """Render a campaign message once, with every header except To"""
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = sender
+    message['Date'] = formatdate(localtime=True)
+    message.set_content(text_body)
+    if html_body:
+        message.add_alternative(html_body, subtype='html')
+    return message.as_bytes(policy=policy.SMTP)
+
+def _unavailable(recipient, pool, attempts=0):
+    """Status of a recipient not sent to because the pool is unavailable"""
+    return {'email': recipient, 'status': 'failed', 'attempts': attempts, 'error': f"SMTP server unavailable: {pool.error}"}
+
+def _send_one(pool, connection, sender, recipient, message, max_retries):
+    """Send the message to one recipient, retrying temporary failures with backoff
+
+    Returns (connection, status); the connection is None if it was lost and could
+    not be reopened, in which case the pool is marked unavailable.
+    """
+    if not is_valid_email(recipient):
+        return connection, {'email': recipient, 'status': 'failed', 'attempts': 0, 'error': "Invalid email address"}
+
+    data = f"To: {recipient}\r\n".encode('utf-8') + message
+    attempts = 0
+    while True:
+        if connection is None:
+            try:
+                connection = pool.connect()
+            except (smtplib.SMTPException, OSError):
+                return None, _unavailable(recipient, pool, attempts)
+        attempts += 1
+        try:
+            connection.sendmail(sender, [recipient], data)
+            return connection, {'email': recipient, 'status': 'sent', 'attempts': attempts, 'error': None}
+        except ValueError as e:
+            # Refused by smtplib itself, so retrying cannot help; reset the half-open transaction
+            try:
+                connection.rset()
+            except (smtplib.SMTPException, OSError):
+                _close(connection)
+                connection = None
+            return connection, {'email': recipient, 'status': 'failed', 'attempts': attempts, 'error': str(e)}
+        except smtplib.SMTPRecipientsRefused as e:
+            code, error = e.recipients.get(recipient, (None, str(e)))
+        except smtplib.SMTPResponseException as e:
+            code, error = e.smtp_code, e.smtp_error
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            # Dropped connection: open a fresh one for the retry
+            if connection is not None:
+                _close(connection)
+            connection, code, error = None, None, str(e)
+
+        if isinstance(error, bytes):
+            error = error.decode('utf-8', 'replace')
+        if (code is not None and code >= 500) or attempts > max_retries:
+            return connection, {'email': recipient, 'status': 'failed', 'attempts': attempts, 'error': f"{code} {error}" if code else error}
+        time.sleep(RETRY_BACKOFF * 2 ** (attempts - 1))
+
+def _send_batch(pool, sender, recipients, message, max_retries):
+    """Send the message to a batch of recipients over one pooled connection"""
+    connection = pool.acquire()
+    statuses = []
+    try:
+        for recipient in recipients:
+            if pool.error is not None:
+                statuses.append(_unavailable(recipient, pool))
+                continue
+            connection, status = _send_one(pool, connection, sender, recipient, message, max_retries)
+            statuses.append(status)
+    finally:
+        pool.release(connection)
+    return statuses
+
+def deliver(message, recipients, sender=SENDER_ADDRESS, pool=None, pool_size=POOL_SIZE, batch_size=BATCH_SIZE, max_retries=MAX_RETRIES, on_batch=None):
+    """Send a rendered message to every recipient through a connection pool
+
+    Recipients (any iterable, consumed lazily) are split into batches; at most
+    `pool_size` batches are in flight at once, each on its own pooled connection.
+    `on_batch` is called with each batch's statuses as it completes.
+    If the server refuses a new connection, delivery stops: recipients of batches
+    already queued are reported failed, the rest are not attempted, and
+    `pool.error` says why. Returns (sent, failed).
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = SMTPConnectionPool(size=pool_size)
+
+    sent = failed = 0
+    def collect(done):
+        nonlocal sent, failed
+        for future in done:
+            statuses = future.result()
+            for status in statuses:
+                if status['status'] == 'sent':
+                    sent += 1
+                else:
+                    failed += 1
+            if on_batch:
+                on_batch(statuses)
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            pending = set()
+            batch = []
+            for recipient in recipients:
+                if pool.error is not None:
+                    batch = []
+                    break
+                batch.append(recipient)
+                if len(batch) < batch_size:
+                    continue
+                if len(pending) >= pool_size * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(_send_batch, pool, sender, batch, message, max_retries))
+                batch = []
+            if batch:
+                pending.add(executor.submit(_send_batch, pool, sender, batch, message, max_retries))
+            done, _ = wait(pending)
+            collect(done)
+    finally:
+        if own_pool:
+            pool.close()
+    return sent, failed
+
+def send_campaign(subject, text_body, html_body=None, recipients=None, pool_size=POOL_SIZE, batch_size=BATCH_SIZE, max_retries=MAX_RETRIES, progress=None):
+    """Send a newsletter campaign to every active subscriber (or the given recipients)
+
+    Each recipient's status is appended to data/campaigns/<campaign id>.jsonl as its
+    batch completes. `progress` is called with the number of recipients done so far.
+    Returns the campaign summary; its `error` is set if the campaign was stopped
+    because the mail server could not be reached.
+    """
+    if recipients is None:
+        recipients = [s['email'] for s in load_subscribers() if s.get('status', 'active') == 'active']
+
+    campaign_id = str(uuid.uuid4())
+    os.makedirs(CAMPAIGN_DIR, exist_ok=True)
+    status_file = os.path.join(CAMPAIGN_DIR, f"{campaign_id}.jsonl")
+    started_at = datetime.now()
+    message = render_message(subject, text_body, html_body)
+
+    done = 0
+    pool = SMTPConnectionPool(size=pool_size)
+    with open(status_file, 'ab') as file:
+        def record(statuses):
+            nonlocal done
+            file.write(b"".join(json.dumps(status, ensure_ascii=False).encode('utf-8') + b"\n" for status in statuses))
+            file.flush()
+            done += len(statuses)
+            if progress:
+                progress(done)
+
+        try:
+            sent, failed = deliver(message, recipients, pool=pool, pool_size=pool_size, batch_size=batch_size, max_retries=max_retries, on_batch=record)
+        finally:
+            pool.close()
+
+    summary = {
+        'id': campaign_id,
+        'subject': subject,
+        'started_at': started_at.isoformat(),
+        'seconds': round((datetime.now() - started_at).total_seconds(), 3),
+        'sent': sent,
+        'failed': failed,
+        'error': pool.error
+    }
+    with open(CAMPAIGN_INDEX_FILE, 'ab') as file:
+        file.write(json.dumps(summary, ensure_ascii=False).encode('utf-8') + b"\n")
+    return summary
+
+def list_campaigns():
+    """Get the summaries of all sent campaigns, newest first"""
+    if not os.path.exists(CAMPAIGN_INDEX_FILE):
+        return []
+    with open(CAMPAIGN_INDEX_FILE, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.endswith("\n")][::-1]
+
+def get_campaign_statuses(campaign_id, status=None):
+    """Get the per-recipient delivery statuses of a campaign, optionally only one status"""
+    status_file = os.path.join(CAMPAIGN_DIR, f"{os.path.basename(campaign_id)}.jsonl")
+    if not os.path.exists(status_file):
+        return []
+    with open(status_file, 'r', encoding='utf-8') as file:
+        statuses = [json.loads(line) for line in file if line.endswith("\n")]
+    return [s for s in statuses if status is None or s['status'] == status]
@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import smtplib
+import logging
+import threading
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from email.message import EmailMessage
+
+try:
+    import fcntl
+except ImportError:  # Windows: the queue is only shared between threads of one process
+    fcntl = None
+
+from backend.newsletter_sender import SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_USE_TLS, SMTP_TIMEOUT, SENDER_ADDRESS
+
+# Durable notification queue: jobs are appended one JSON object per line, and the
+# cursor file records how far the worker has delivered
+QUEUE_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'notification_queue.jsonl')
+QUEUE_CURSOR_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'notification_queue.cursor')
+QUEUE_LOCK_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'notification_queue.lock')
+WORKER_LOCK_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'notification_worker.lock')
+
+# Jobs that still failed after every retry
+FAILED_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'notification_failed.jsonl')
+
+# Staff channels: email to NOTIFY_EMAIL (through the newsletter SMTP server) and/or a JSON webhook
+NOTIFY_EMAIL = os.environ.get('NOTIFY_EMAIL', '')
+NOTIFY_WEBHOOK_URL = os.environ.get('NOTIFY_WEBHOOK_URL')
+WEBHOOK_TIMEOUT = 10
+
+# Worker tuning
+DIGEST_WINDOW = 10.0        # seconds to keep collecting after the first pending job
+DIGEST_MAX = 50             # jobs coalesced into one notification
+POLL_INTERVAL = 5.0         # seconds between checks when nothing wakes the worker
+MAX_ATTEMPTS = 5            # deliveries tried before jobs go to FAILED_FILE
+RETRY_BACKOFF = 2.0         # seconds before the first retry, doubled for each one after
+COMPACT_BYTES = 1024 * 1024 # delivered bytes kept before the queue file is truncated
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_worker = {"thread": None, "warned": False}
+
+@contextmanager
+def _queue_lock():
+    """Hold the queue lock, across processes where the platform allows"""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(QUEUE_LOCK_FILE, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_cursor():
+    """Get the byte offset of the first undelivered job"""
+    try:
+        with open(QUEUE_CURSOR_FILE, 'r', encoding='utf-8') as file:
+            offset = json.load(file)['offset']
+    except (OSError, ValueError, KeyError):
+        return 0
+    # A cursor past the end is left by a crash between truncating the queue and saving
+    # the cursor; everything in the file was appended after the truncation
+    try:
+        size = os.path.getsize(QUEUE_FILE)
+    except OSError:
+        size = 0
+    return offset if offset <= size else 0
+
+def _write_cursor(offset):
+    """Save the delivered offset atomically"""
+    tmp_file = f"{QUEUE_CURSOR_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump({'offset': offset}, file)
+    os.replace(tmp_file, QUEUE_CURSOR_FILE)
+
+def _record_failed(records):
+    """Append given-up jobs to the failed file"""
+    with open(FAILED_FILE, 'ab') as file:
+        file.write(b"".join(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n" for record in records))
+
+def _parse_job(line):
+    """Decode one queue line, raising ValueError or TypeError if it is not a job"""
+    job = json.loads(line)
+    if not isinstance(job, dict) or 'payload' not in job:
+        raise ValueError("missing payload")
+    datetime.fromisoformat(job.get('enqueued_at', ''))
+    return job
+
+def _pending_jobs(limit=None):
+    """Read undelivered jobs as (job, end offset) pairs (queue lock held)
+
+    A line that is not a valid job is moved to FAILED_FILE and skipped when it is
+    first in line, so it cannot hold up the jobs behind it; later in a batch it
+    ends the batch and is dealt with on the next read.
+    """
+    offset = _read_cursor()
+    jobs = []
+    try:
+        with open(QUEUE_FILE, 'rb') as file:
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b"\n") or (limit is not None and len(jobs) >= limit):
+                    break
+                try:
+                    job = _parse_job(line)
+                except (ValueError, TypeError) as e:
+                    if jobs:
+                        break
+                    _record_failed([{'raw': line.decode('utf-8', 'replace'), 'error': f"Malformed job: {e}", 'failed_at': datetime.now().isoformat()}])
+                    offset += len(line)
+                    _write_cursor(offset)
+                    continue
+                offset += len(line)
+                jobs.append((job, offset))
+    except OSError:
+        pass
+    return jobs
+
+def enqueue_notification(kind, payload):
+    """Queue a staff notification and wake the worker; returns without delivering"""
+    job = {'kind': kind, 'payload': payload, 'enqueued_at': datetime.now().isoformat()}
+    os.makedirs(os.path.dirname(QUEUE_FILE), exist_ok=True)
+    with _queue_lock():
+        with open(QUEUE_FILE, 'ab') as file:
+            file.write(json.dumps(job, ensure_ascii=False).encode('utf-8') + b"\n")
+    start_worker()
+    _wake.set()
+
+def notify_contact_message(message):
+    """Queue a notification about a new contact form submission"""
+    enqueue_notification('contact_message', {
+        'id': message.get('id'),
+        'name': message.get('name'),
+        'email': message.get('email'),
+        'message': message.get('message'),
+        'created_at': message.get('created_at')
+    })
+
+def get_queue_depth():
+    """Get the number of notifications waiting to be delivered"""
+    offset = _read_cursor()
+    try:
+        with open(QUEUE_FILE, 'rb') as file:
+            file.seek(offset)
+            return file.read().count(b"\n")
+    except OSError:
+        return 0
+
+def render_notification(jobs):
+    """Build (subject, text) for one job or a digest of several"""
+    payloads = [job['payload'] for job in jobs]
+    if len(payloads) == 1:
+        p = payloads[0]
+        subject = f"New contact message from {p.get('name') or 'Unknown'}"
+    else:
+        subject = f"{len(payloads)} new contact messages"
+
+    lines = []
+    for p in payloads:
+        lines.append(f"From: {p.get('name')} <{p.get('email')}> at {p.get('created_at')}")
+        lines.append(p.get('message') or "")
+        lines.append("")
+    lines.append("Open the Admin Panel's Contact Messages tab to reply.")
+    return subject, "\n".join(lines)
+
+def send_email_notification(subject, text):
+    """Email a notification to the staff address"""
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = SENDER_ADDRESS
+    message['To'] = NOTIFY_EMAIL
+    message.set_content(text)
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as connection:
+        if SMTP_USE_TLS:
+            connection.starttls()
+        if SMTP_USERNAME:
+            connection.login(SMTP_USERNAME, SMTP_PASSWORD)
+        connection.send_message(message)
+
+def send_webhook_notification(subject, text, jobs):
+    """POST a notification as JSON to the staff webhook"""
+    body = json.dumps({
+        'subject': subject,
+        'text': text,
+        'notifications': [job['payload'] for job in jobs]
+    }, ensure_ascii=False).encode('utf-8')
+    request = urllib.request.Request(NOTIFY_WEBHOOK_URL, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+    with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT) as response:
+        response.read()
+
+def notification_channels():
+    """Get the names of the configured staff channels"""
+    channels = []
+    if NOTIFY_EMAIL:
+        channels.append('email')
+    if NOTIFY_WEBHOOK_URL:
+        channels.append('webhook')
+    return channels
+
+def deliver_notifications(jobs, channels=None):
+    """Send one notification (a digest if there are several jobs) on each channel
+
+    Defaults to every configured channel. Returns {channel: error} for the channels
+    that failed, so a retry only resends on those.
+    """
+    subject, text = render_notification(jobs)
+    errors = {}
+    for channel in notification_channels() if channels is None else channels:
+        try:
+            if channel == 'email':
+                send_email_notification(subject, text)
+            else:
+                send_webhook_notification(subject, text, jobs)
+        except (smtplib.SMTPException, OSError) as e:
+            errors[channel] = str(e)
+    return errors
+
+def process_queue():
+    """Deliver pending jobs in digests until the queue is empty
+
+    Returns the number of jobs handled. Jobs are acknowledged (the cursor moved past
+    them) only after delivery succeeds or they are given up on, so none are lost
+    if the process stops mid-way. With no channel configured nothing is handled;
+    jobs stay queued until one is.
+    """
+    if not notification_channels():
+        return 0
+
+    handled = 0
+    while True:
+        with _queue_lock():
+            batch = _pending_jobs(DIGEST_MAX)
+        if not batch:
+            return handled
+
+        # Let a burst finish arriving so it goes out as one digest
+        enqueued_at = datetime.fromisoformat(batch[0][0]['enqueued_at'])
+        wait = DIGEST_WINDOW - (datetime.now() - enqueued_at).total_seconds()
+        if wait > 0 and len(batch) < DIGEST_MAX:
+            time.sleep(wait)
+            with _queue_lock():
+                batch = _pending_jobs(DIGEST_MAX)
+
+        if not batch:
+            continue  # Only malformed lines were waiting
+
+        # Each channel is retried on its own, so one that already delivered is not resent
+        jobs = [job for job, _ in batch]
+        pending = notification_channels()
+        for attempt in range(MAX_ATTEMPTS):
+            errors = deliver_notifications(jobs, pending)
+            pending = list(errors)
+            if not pending:
+                break
+            if attempt < MAX_ATTEMPTS - 1:
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        else:
+            failed_at = datetime.now().isoformat()
+            _record_failed([dict(job, channels=pending, error="; ".join(f"{c}: {e}" for c, e in errors.items()), failed_at=failed_at) for job in jobs])
+
+        with _queue_lock():
+            offset = batch[-1][1]
+            # Start a fresh queue file once everything in a large one is delivered
+            if offset >= COMPACT_BYTES and offset == os.path.getsize(QUEUE_FILE):
+                open(QUEUE_FILE, 'wb').close()
+                offset = 0
+            _write_cursor(offset)
+        handled += len(jobs)
+
+def _run_worker():
+    """Worker loop: owns delivery for all processes while it holds the worker lock"""
+    lock_file = open(WORKER_LOCK_FILE, 'a') if fcntl is not None else None
+    while True:
+        if lock_file is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                time.sleep(POLL_INTERVAL)  # Another process is delivering
+                continue
+        try:
+            while True:
+                _wake.clear()
+                process_queue()
+                _wake.wait(POLL_INTERVAL)
+        except Exception as e:
+            print(f"Notification worker error: {e}")
+            time.sleep(POLL_INTERVAL)
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def start_worker():
+    """Start the background delivery thread once per process (not while no channel is configured)"""
+    with _lock:
+        if not notification_channels():
+            if not _worker["warned"]:
+                logger.warning("No staff notification channel configured (NOTIFY_EMAIL, NOTIFY_WEBHOOK_URL); notifications stay queued")
+                _worker["warned"] = True
+            return
+        if _worker["thread"] is None or not _worker["thread"].is_alive():
+            _worker["thread"] = threading.Thread(target=_run_worker, name="notification-worker", daemon=True)
+            _worker["thread"].start()
+
+# Deliver jobs left undelivered by an earlier run without waiting for a new one
+if get_queue_depth() > 0:
+    start_worker()
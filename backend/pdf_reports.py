@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+from datetime import datetime
+from io import BytesIO
+from reportlab.platypus import Paragraph, Spacer, Table
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFName, PDFStream
+
+from backend.report_template import HISTORY_TABLE_STYLE, build_report, get_report_styles, parameter_table, plan_flowables
+
+logger = logging.getLogger(__name__)
+
+# Rendered group PDFs, keyed by report content hash and the date they carry
+PDF_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'pdf_cache')
+PDF_DISK_CACHE_SIZE = 512
+
+# Analyses per table chunk in the full-history report
+HISTORY_ROWS_PER_CHUNK = 40
+
+def generate_pdf_report(analysis_data, plan=None):
+    """Generate PDF report combining analysis data and implementation plan"""
+    buffer = BytesIO()
+    styles = get_report_styles()
+    normal_style = styles['normal']
+    heading_style = styles['heading']
+
+    elements = []
+
+    # Title
+    elements.append(Paragraph("Soil Analysis Report", styles['title']))
+    elements.append(Spacer(1, 12))
+
+    # Date
+    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Predicted Crop
+    elements.append(Paragraph(f"Predicted Crop: {analysis_data['predicted_crop']}", heading_style))
+    elements.append(Paragraph("Confidence: 99.32%", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Soil Parameters Table
+    elements.append(Paragraph("Soil Parameters:", heading_style))
+    elements.append(parameter_table([
+        ['Parameter', 'Value', 'Unit'],
+        ['Nitrogen', f"{analysis_data['nitrogen']}", 'ppm'],
+        ['Phosphorus', f"{analysis_data['phosphorus']}", 'ppm'],
+        ['Potassium', f"{analysis_data['potassium']}", 'ppm'],
+        ['pH', f"{analysis_data['ph']}", ''],
+        ['Temperature', f"{analysis_data['temperature']}", '°C'],
+        ['Humidity', f"{analysis_data['humidity']}", '%'],
+        ['Rainfall', f"{analysis_data['rainfall']}", 'cm'],
+        ['Area', f"{analysis_data['area']}", analysis_data['area_unit']]
+    ]))
+    elements.append(Spacer(1, 20))
+
+    # Implementation Plan
+    if plan:
+        elements.extend(plan_flowables(plan))
+
+    # Build PDF
+    build_report(buffer, elements)
+    buffer.seek(0)
+    return buffer
+
+def generate_group_pdf_report(report, generated_on=None):
+    """Generate PDF report for group analysis, dated `generated_on` (default: now)"""
+    buffer = BytesIO()
+    styles = get_report_styles()
+    normal_style = styles['normal']
+    heading_style = styles['heading']
+    params = report['avg_parameters']
+
+    elements = []
+
+    # Title
+    elements.append(Paragraph("Group Soil Analysis Report", styles['title']))
+    elements.append(Spacer(1, 12))
+
+    # Group Info
+    elements.append(Paragraph(f"Report ID: {report['group_id']}", normal_style))
+    elements.append(Paragraph(f"Generated on: {generated_on or datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Predicted Crop
+    elements.append(Paragraph(f"Predicted Crop: {report['predicted_crop']}", heading_style))
+    elements.append(Paragraph("Confidence: Based on averaged parameters", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Averaged Soil Parameters Table
+    elements.append(Paragraph("Averaged Soil Parameters:", heading_style))
+    elements.append(parameter_table([
+        ['Parameter', 'Average Value', 'Unit'],
+        ['Nitrogen', f"{params['nitrogen']:.1f}", 'ppm'],
+        ['Phosphorus', f"{params['phosphorus']:.1f}", 'ppm'],
+        ['Potassium', f"{params['potassium']:.1f}", 'ppm'],
+        ['pH', f"{params['ph']:.1f}", ''],
+        ['Temperature', f"{params['temperature']:.1f}", '°C'],
+        ['Humidity', f"{params['humidity']:.1f}", '%'],
+        ['Rainfall', f"{params['rainfall']:.1f}", 'cm']
+    ]))
+    elements.append(Spacer(1, 20))
+
+    # Implementation Plan
+    if report['plan']:
+        elements.extend(plan_flowables(report['plan']))
+
+    # Build PDF
+    build_report(buffer, elements)
+    buffer.seek(0)
+    return buffer
+
+def report_content_hash(report):
+    """Hash the contents of a group report"""
+    payload = json.dumps(report, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _prune_pdf_disk_cache():
+    """Drop the least recently used PDFs beyond the disk cache size"""
+    try:
+        entries = [os.path.join(PDF_CACHE_DIR, name) for name in os.listdir(PDF_CACHE_DIR) if name.endswith('.pdf')]
+    except OSError:
+        return
+    if len(entries) <= PDF_DISK_CACHE_SIZE:
+        return
+    entries.sort(key=os.path.getmtime)
+    for path in entries[:len(entries) - PDF_DISK_CACHE_SIZE]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _group_pdf_file(report, generated_on):
+    """Path of a group report's cached PDF for a given date"""
+    return os.path.join(PDF_CACHE_DIR, f"{report_content_hash(report)}-{generated_on}.pdf")
+
+def get_group_pdf(report):
+    """Get PDF bytes for a group report, rendering it only on a cache miss
+
+    Cached PDFs are dated (day only) and keyed by that date, so a download never
+    carries an earlier day's date; each report is rendered at most once a day.
+    """
+    generated_on = datetime.now().strftime('%Y-%m-%d')
+    pdf_file = _group_pdf_file(report, generated_on)
+    if os.path.exists(pdf_file):
+        with open(pdf_file, 'rb') as file:
+            pdf_data = file.read()
+        os.utime(pdf_file)
+        return pdf_data
+
+    start = time.perf_counter()
+    pdf_data = generate_group_pdf_report(report, generated_on).getvalue()
+    logger.info("Rendered group PDF %s in %.1f ms", os.path.basename(pdf_file)[:12], (time.perf_counter() - start) * 1000)
+
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    tmp_file = f"{pdf_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as file:
+        file.write(pdf_data)
+    os.replace(tmp_file, pdf_file)
+    _prune_pdf_disk_cache()
+    return pdf_data
+
+def is_group_pdf_cached(report):
+    """Check whether a group report's PDF is already rendered for today"""
+    return os.path.exists(_group_pdf_file(report, datetime.now().strftime('%Y-%m-%d')))
+
+class _ChunkedStory(list):
+    """Flowable list refilled from a generator as the document consumes it
+
+    ReportLab's build loop pops flowables off the front of the list and checks
+    len() on every step, so keeping only a couple of chunks buffered bounds the
+    number of live flowables regardless of document length.
+    """
+
+    def __init__(self, chunks, low_water=2):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._low_water = low_water
+
+    def __len__(self):
+        while list.__len__(self) < self._low_water:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self.extend(chunk)
+        return list.__len__(self)
+
+class _CompressingCanvas(Canvas):
+    """Canvas that compresses each page's content stream as soon as the page is finished
+
+    ReportLab keeps every page in memory until the document is saved; holding them
+    deflated keeps that at roughly the size of the final file.
+    """
+
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if page.stream:
+            stream = PDFStream(content=zlib.compress(page.stream.encode('latin-1')))
+            stream.dictionary['Filter'] = PDFArray([PDFName('FlateDecode')])
+            stream.__Comment__ = "page stream"
+            page.Contents = stream
+            page.stream = None
+
+def _history_chunks(analyses, title):
+    """Yield flowables for the full-history report one table chunk at a time"""
+    styles = get_report_styles()
+    title_style = styles['title']
+    heading_style = styles['heading']
+    normal_style = styles['normal']
+    header = ['Date', 'Crop', 'N', 'P', 'K', 'pH', 'Temp', 'Humidity', 'Rainfall', 'Area', 'Plan']
+
+    yield [
+        Paragraph(title, title_style),
+        Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style),
+        Spacer(1, 12),
+        Paragraph("Analysis History:", heading_style)
+    ]
+
+    count = 0
+    crops = {}
+    first_date = last_date = None
+    rows = [header]
+    for analysis in analyses:
+        date = analysis.timestamp.strftime('%Y-%m-%d')
+        crop = analysis.predicted_crop or 'N/A'
+        rows.append([
+            date,
+            crop,
+            f"{analysis.nitrogen or 0:.1f}",
+            f"{analysis.phosphorus or 0:.1f}",
+            f"{analysis.potassium or 0:.1f}",
+            f"{analysis.ph or 0:.1f}",
+            f"{analysis.temperature or 0:.1f}",
+            f"{analysis.humidity or 0:.1f}",
+            f"{analysis.rainfall or 0:.1f}",
+            f"{analysis.area if analysis.area is not None else 'N/A'} {analysis.area_unit or 'ha'}",
+            analysis.selected_variant or 'N/A'
+        ])
+
+        count += 1
+        crops[crop] = crops.get(crop, 0) + 1
+        first_date = first_date or date
+        last_date = date
+
+        if len(rows) > HISTORY_ROWS_PER_CHUNK:
+            yield [Table(rows, style=HISTORY_TABLE_STYLE, repeatRows=1)]
+            rows = [header]
+
+    if len(rows) > 1:
+        yield [Table(rows, style=HISTORY_TABLE_STYLE, repeatRows=1)]
+
+    # Summary is accumulated while streaming, so it goes at the end
+    summary = [Spacer(1, 20), Paragraph("Summary:", heading_style)]
+    summary.append(Paragraph(f"Total analyses: {count}", normal_style))
+    if count:
+        summary.append(Paragraph(f"Period: {first_date} to {last_date}", normal_style))
+        for crop, crop_count in sorted(crops.items(), key=lambda c: -c[1]):
+            summary.append(Paragraph(f"  • {crop}: {crop_count}", normal_style))
+    yield summary
+
+def write_history_pdf_report(analyses, output, title="Full Analysis History Report"):
+    """Write a multi-page PDF of an analysis history to a file path or binary file
+
+    `analyses` may be any iterable; flowables are built chunk by chunk while the
+    document is laid out, so memory stays flat as the history grows.
+    """
+    start = time.perf_counter()
+    build_report(output, _ChunkedStory(_history_chunks(analyses, title)), canvasmaker=_CompressingCanvas)
+    logger.info("Rendered history PDF in %.1f ms", (time.perf_counter() - start) * 1000)
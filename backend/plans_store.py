@@ -0,0 +1,149 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+# Implementation plans, one top-level entry per crop (written by expand_plans.py)
+PLANS_FILE = os.path.join(os.path.dirname(__file__), 'implementation_plans_expanded.json')
+
+# Byte range of each crop's entry in PLANS_FILE, shared by every worker process
+PLANS_INDEX_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'plans_index.json')
+
+# Parsed crop plans kept in memory per process
+PLAN_CACHE_SIZE = 8
+
+_lock = threading.Lock()
+_store = {
+    "source": None,          # (size, mtime_ns) of the plans file the index describes
+    "ranges": OrderedDict(), # crop -> (start, end) byte offsets, in file order
+    "plans": OrderedDict()   # crop -> parsed plan, least recently used first
+}
+
+def _source_state():
+    """Get the plans file's (size, mtime_ns), None if it does not exist"""
+    try:
+        stat = os.stat(PLANS_FILE)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+def _skip_whitespace(text, pos):
+    while pos < len(text) and text[pos] in ' \t\r\n':
+        pos += 1
+    return pos
+
+def build_plans_index():
+    """Scan the plans file once and record the byte range of every crop's entry"""
+    with open(PLANS_FILE, 'rb') as file:
+        data = file.read()
+    text = data.decode('utf-8')
+    decoder = json.JSONDecoder()
+
+    ranges = []
+    pos = _skip_whitespace(text, 0)
+    if text[pos] != '{':
+        raise ValueError("Plans file must hold a JSON object")
+    pos = _skip_whitespace(text, pos + 1)
+    char_pos = byte_pos = 0
+    while text[pos] != '}':
+        crop, pos = decoder.raw_decode(text, pos)
+        pos = _skip_whitespace(text, pos)
+        pos = _skip_whitespace(text, pos + 1)  # ':'
+        _, end = decoder.raw_decode(text, pos)
+
+        # Character offsets to byte offsets, counting only the text since the last entry
+        start_byte = byte_pos + len(text[char_pos:pos].encode('utf-8'))
+        end_byte = start_byte + len(text[pos:end].encode('utf-8'))
+        char_pos, byte_pos = end, end_byte
+        ranges.append([crop, start_byte, end_byte])
+
+        pos = _skip_whitespace(text, end)
+        if text[pos] == ',':
+            pos = _skip_whitespace(text, pos + 1)
+    return ranges
+
+def _load_index(source):
+    """Load the crop index for the current plans file, rebuilding it if the file changed"""
+    try:
+        with open(PLANS_INDEX_FILE, 'r', encoding='utf-8') as file:
+            index = json.load(file)
+        if index.get('source') == list(source):
+            return index['crops']
+    except (OSError, ValueError):
+        pass
+
+    crops = build_plans_index()
+    os.makedirs(os.path.dirname(PLANS_INDEX_FILE), exist_ok=True)
+    tmp_file = f"{PLANS_INDEX_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump({'source': list(source), 'crops': crops}, file, ensure_ascii=False)
+    os.replace(tmp_file, PLANS_INDEX_FILE)
+    return crops
+
+def _refresh():
+    """Make sure the index matches the plans file, dropping cached plans if it changed"""
+    source = _source_state()
+    if source is None:
+        raise FileNotFoundError(PLANS_FILE)
+    if _store["source"] != source:
+        crops = _load_index(source)
+        _store.update({
+            "source": source,
+            "ranges": OrderedDict((crop, (start, end)) for crop, start, end in crops),
+            "plans": OrderedDict()
+        })
+
+def get_plan_crops():
+    """Get the names of all crops with plans, in file order"""
+    with _lock:
+        _refresh()
+        return list(_store["ranges"].keys())
+
+def get_crop_plan(crop):
+    """Get one crop's plan, reading only its entry from the plans file; None if there is none"""
+    with _lock:
+        _refresh()
+        plans = _store["plans"]
+        if crop in plans:
+            plans.move_to_end(crop)
+            return plans[crop]
+        if crop not in _store["ranges"]:
+            return None
+
+        start, end = _store["ranges"][crop]
+        with open(PLANS_FILE, 'rb') as file:
+            file.seek(start)
+            plan = json.loads(file.read(end - start))
+        plans[crop] = plan
+        if len(plans) > PLAN_CACHE_SIZE:
+            plans.popitem(last=False)
+        return plan
+
+class PlansMapping(Mapping):
+    """Read-only, dict-like view of the plans file that loads crops on first access
+
+    It holds no data itself, so it is cheap to pickle (st.cache_data, worker processes)
+    and every copy shares the per-process plan cache.
+    """
+
+    def __getitem__(self, crop):
+        plan = get_crop_plan(crop)
+        if plan is None:
+            raise KeyError(crop)
+        return plan
+
+    def __iter__(self):
+        return iter(get_plan_crops())
+
+    def __len__(self):
+        return len(get_plan_crops())
+
+    def __contains__(self, crop):
+        with _lock:
+            _refresh()
+            return crop in _store["ranges"]
+
+def load_plans():
+    """Get the implementation plans as a lazily loaded mapping of crop -> plan"""
+    return PlansMapping()
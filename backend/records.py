@@ -0,0 +1,151 @@
+import sys
+from datetime import datetime
+
+# Known fields of a saved analysis, as written by the soil analysis page
+ANALYSIS_FIELDS = ('nitrogen', 'phosphorus', 'potassium', 'ph', 'temperature', 'humidity', 'rainfall',
+                   'area', 'area_unit', 'predicted_crop', 'variants', 'selected_variant', 'selected_plan')
+
+# Low-cardinality string fields, interned so every analysis shares one copy
+INTERNED_FIELDS = ('area_unit', 'predicted_crop', 'selected_variant')
+
+# Known fields of a user profile in users.yaml
+USER_FIELDS = ('password', 'email', 'name', 'role', 'created_at', 'active', 'analyses')
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp, passing datetimes (and None) through"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+class Analysis:
+    """One saved soil analysis with its timestamp parsed once at load time
+
+    Unknown data keys are kept in `extra`, so a load/save round trip is lossless.
+    Item access (`analysis['timestamp']`, `analysis['data']`) mirrors the stored dict
+    for code written against the YAML layout.
+    """
+    __slots__ = ('timestamp',) + ANALYSIS_FIELDS + ('extra',)
+
+    def __init__(self, timestamp, **data):
+        self.timestamp = parse_timestamp(timestamp)
+        for field in ANALYSIS_FIELDS:
+            value = data.pop(field, None)
+            if field in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+        if self.variants:
+            self.variants = [sys.intern(v) if isinstance(v, str) else v for v in self.variants]
+        self.extra = data or None
+
+    @classmethod
+    def from_dict(cls, entry):
+        """Build an analysis from its stored dict"""
+        return cls(entry.get('timestamp'), **(entry.get('data') or {}))
+
+    @property
+    def data(self):
+        """Analysis fields as a plain dict"""
+        data = {field: getattr(self, field) for field in ANALYSIS_FIELDS if getattr(self, field) is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_dict(self):
+        """Convert to the stored dict layout"""
+        return {
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'data': self.data
+        }
+
+    def __getitem__(self, key):
+        if key == 'timestamp':
+            return self.timestamp.isoformat() if self.timestamp else None
+        if key == 'data':
+            return self.data
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"Analysis({self.timestamp!r}, predicted_crop={self.predicted_crop!r})"
+
+class UserProfile:
+    """One user account with its analysis history
+
+    `active` is None when the account was never activated/deactivated, which reads as
+    active. Mapping-style `get()` and item access return the stored representation
+    (ISO `created_at`), so pages can keep treating a profile like the YAML dict.
+    """
+    __slots__ = ('username',) + USER_FIELDS + ('extra',)
+
+    def __init__(self, username, password=None, email=None, name=None, role='user',
+                 created_at=None, active=None, analyses=None, **extra):
+        self.username = username
+        self.password = password
+        self.email = email
+        self.name = name
+        self.role = sys.intern(role) if isinstance(role, str) else role
+        self.created_at = parse_timestamp(created_at)
+        self.active = active
+        self.analyses = analyses if analyses is not None else []
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, username, entry):
+        """Build a profile (and its analyses) from its stored dict"""
+        entry = dict(entry or {})
+        analyses = [Analysis.from_dict(a) for a in entry.pop('analyses', None) or []]
+        return cls(username, analyses=analyses, **entry)
+
+    @property
+    def is_active(self):
+        """Whether the account may log in"""
+        return self.active is not False
+
+    def to_dict(self):
+        """Convert to the stored dict layout"""
+        entry = {
+            'password': self.password,
+            'email': self.email,
+            'name': self.name,
+            'role': self.role,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'analyses': [a.to_dict() for a in self.analyses]
+        }
+        if self.active is not None:
+            entry['active'] = self.active
+        if self.extra:
+            entry.update(self.extra)
+        return entry
+
+    def __getitem__(self, key):
+        if key == 'created_at':
+            return self.created_at.isoformat() if self.created_at else None
+        if key in USER_FIELDS:
+            value = getattr(self, key)
+            if value is None and key == 'active':
+                raise KeyError(key)
+            return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"UserProfile({self.username!r}, role={self.role!r}, analyses={len(self.analyses)})"
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib import colors
+from reportlab.pdfgen.canvas import Canvas
+
+# Static page decoration text
+HEADER_TEXT = "AgriSakha - Smart Soil Testing & Recommendation System"
+FOOTER_TEXT = "Generated by AgriSakha"
+
+# Soil parameter tables (single, group and history reports)
+PARAMETER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+HISTORY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+])
+
+@lru_cache(maxsize=None)
+def get_report_styles():
+    """Build the paragraph styles shared by all PDF reports (once per process)"""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'Title',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceAfter=30,
+            alignment=1  # Center
+        ),
+        'heading': ParagraphStyle(
+            'Heading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=20
+        ),
+        'normal': styles['Normal']
+    }
+
+def draw_page_decorations(canvas, doc):
+    """Draw the static header and page-numbered footer on every page"""
+    width, height = doc.pagesize
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawString(doc.leftMargin, height - doc.topMargin / 2, HEADER_TEXT)
+    canvas.drawString(doc.leftMargin, doc.bottomMargin / 2, FOOTER_TEXT)
+    canvas.drawRightString(width - doc.rightMargin, doc.bottomMargin / 2, f"Page {doc.page}")
+    canvas.restoreState()
+
+def parameter_table(rows):
+    """Build a soil parameter table with the shared style"""
+    return Table(rows, style=PARAMETER_TABLE_STYLE)
+
+def plan_flowables(plan):
+    """Build the Implementation Plan section of a report"""
+    styles = get_report_styles()
+    normal_style = styles['normal']
+
+    elements = [Paragraph("Implementation Plan:", styles['heading'])]
+    for key, value in plan.items():
+        elements.append(Paragraph(f"<b>{key.title()}:</b>", normal_style))
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                elements.append(Paragraph(f"  • {sub_key}: {sub_value}", normal_style))
+        elif isinstance(value, list):
+            for item in value:
+                elements.append(Paragraph(f"  • {item}", normal_style))
+        else:
+            elements.append(Paragraph(f"  {value}", normal_style))
+        elements.append(Spacer(1, 6))
+    return elements
+
+def build_report(output, elements, canvasmaker=Canvas):
+    """Lay out report flowables on the shared page template"""
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    doc.build(
+        elements,
+        onFirstPage=draw_page_decorations,
+        onLaterPages=draw_page_decorations,
+        canvasmaker=canvasmaker
+    )
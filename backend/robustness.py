@@ -0,0 +1,66 @@
+import numpy as np
+
+# Model input order
+FEATURES = ['nitrogen', 'phosphorus', 'potassium', 'ph', 'temperature', 'humidity', 'rainfall']
+
+# Default weather uncertainty around the values entered on the soil form.
+# normal: additive noise with std `scale`; uniform: additive noise in [-scale, scale];
+# lognormal: multiplicative noise with log-std `scale` (keeps rainfall positive)
+DEFAULT_DISTRIBUTIONS = {
+    'temperature': {'type': 'normal', 'scale': 2.0},
+    'humidity': {'type': 'normal', 'scale': 5.0},
+    'rainfall': {'type': 'lognormal', 'scale': 0.25}
+}
+
+# Valid ranges, matching the soil analysis form
+FEATURE_BOUNDS = {
+    'temperature': (-10.0, 50.0),
+    'humidity': (0.0, 100.0),
+    'rainfall': (0.0, 500.0)
+}
+
+def sample_weather_scenarios(sample, n_samples=2000, distributions=None, seed=None):
+    """Build an (n_samples, 7) matrix of weather perturbations around a soil sample"""
+    distributions = distributions or DEFAULT_DISTRIBUTIONS
+    rng = np.random.default_rng(seed)
+
+    base = np.array([float(sample[f]) for f in FEATURES])
+    scenarios = np.tile(base, (n_samples, 1))
+
+    for feature, dist in distributions.items():
+        col = FEATURES.index(feature)
+        kind = dist.get('type', 'normal')
+        scale = float(dist.get('scale', 0.0))
+
+        if kind == 'normal':
+            scenarios[:, col] += rng.normal(0.0, scale, n_samples)
+        elif kind == 'uniform':
+            scenarios[:, col] += rng.uniform(-scale, scale, n_samples)
+        elif kind == 'lognormal':
+            scenarios[:, col] *= rng.lognormal(0.0, scale, n_samples)
+        else:
+            raise ValueError(f"Unknown distribution type '{kind}' for {feature}")
+
+        low, high = FEATURE_BOUNDS.get(feature, (-np.inf, np.inf))
+        np.clip(scenarios[:, col], low, high, out=scenarios[:, col])
+
+    return scenarios
+
+def robust_recommendation(model, encoder, sample, n_samples=2000, distributions=None, seed=None):
+    """Predict crops for sampled weather scenarios and report how often each crop wins"""
+    scenarios = sample_weather_scenarios(sample, n_samples, distributions, seed)
+
+    # One vectorised forest call for every scenario
+    predictions = model.predict(scenarios)
+    labels, counts = np.unique(predictions, return_counts=True)
+    crops = encoder.classes_[labels.astype(int)] if labels.dtype.kind in 'iu' else labels
+
+    order = np.argsort(-counts)
+    return [
+        {
+            'crop': str(crops[i]),
+            'wins': int(counts[i]),
+            'share': float(counts[i] / n_samples)
+        }
+        for i in order
+    ]
@@ -0,0 +1,143 @@
+import os
+import threading
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from backend.auth import USER_DATA_FILE, load_user_profiles
+
+# Soil features used for similarity, in model input order
+FEATURES = ['nitrogen', 'phosphorus', 'potassium', 'ph', 'temperature', 'humidity', 'rainfall']
+
+# Number of incremental inserts kept outside the tree before it is rebuilt
+REBUILD_THRESHOLD = 256
+
+_lock = threading.Lock()
+_index = {
+    "tree": None,       # BallTree over scaled features of indexed rows
+    "features": None,   # float array (n, 7) of raw features of indexed rows
+    "rows": [],         # metadata for indexed rows, aligned with features
+    "usernames": None,  # owner of each indexed row, for per-user filtering
+    "pending": [],      # rows inserted since the last rebuild
+    "scale": None,      # per-feature scale used to normalise distances
+    "mtime": None       # users.yaml mtime the index reflects
+}
+
+def _analysis_row(username, analysis):
+    """Extract index row (metadata + feature vector) from a saved analysis"""
+    try:
+        features = [float(getattr(analysis, f)) for f in FEATURES]
+    except (TypeError, ValueError):
+        return None
+    return {
+        "username": username,
+        "timestamp": analysis['timestamp'],
+        "predicted_crop": analysis.predicted_crop,
+        "selected_variant": analysis.selected_variant,
+        "features": features
+    }
+
+def _source_mtime():
+    """Get modification time of the user data file"""
+    try:
+        return os.path.getmtime(USER_DATA_FILE)
+    except OSError:
+        return None
+
+def _rebuild(rows):
+    """Rebuild the ball tree from scratch over the given rows"""
+    if rows:
+        features = np.array([r["features"] for r in rows], dtype=float)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        tree = BallTree(features / scale)
+    else:
+        features = np.empty((0, len(FEATURES)))
+        scale = np.ones(len(FEATURES))
+        tree = None
+
+    _index.update({
+        "tree": tree,
+        "features": features,
+        "rows": rows,
+        "usernames": np.array([r["username"] for r in rows], dtype=object),
+        "pending": [],
+        "scale": scale,
+        "mtime": _source_mtime()
+    })
+
+def rebuild_index():
+    """Rebuild the similarity index from every saved analysis"""
+    rows = []
+    for username, user in load_user_profiles().items():
+        for analysis in user.analyses:
+            row = _analysis_row(username, analysis)
+            if row:
+                rows.append(row)
+    with _lock:
+        _rebuild(rows)
+
+def _ensure_index():
+    """Build the index on first use or if users.yaml changed behind our back"""
+    if _index["scale"] is None or _index["mtime"] != _source_mtime():
+        rebuild_index()
+
+def add_analysis_to_index(username, analysis):
+    """Insert a newly saved analysis into the index"""
+    row = _analysis_row(username, analysis)
+    with _lock:
+        if _index["scale"] is None:
+            return  # Built lazily on first query
+        if row:
+            _index["pending"].append(row)
+        _index["mtime"] = _source_mtime()
+        if len(_index["pending"]) >= REBUILD_THRESHOLD:
+            _rebuild(_index["rows"] + _index["pending"])
+
+def _to_vector(sample):
+    """Convert a sample (dict of features or sequence) to a feature vector"""
+    if isinstance(sample, dict):
+        return np.array([float(sample[f]) for f in FEATURES])
+    return np.asarray(sample, dtype=float).reshape(len(FEATURES))
+
+def find_similar_analyses(sample, k=5, username=None, role="user"):
+    """Find the k nearest historical analyses to a soil sample
+
+    Super admins search across all users; everyone else only sees their own history.
+    """
+    _ensure_index()
+    query = _to_vector(sample)
+
+    with _lock:
+        rows = _index["rows"]
+        features = _index["features"]
+        usernames = _index["usernames"]
+        pending = _index["pending"]
+        scale = _index["scale"]
+        tree = _index["tree"]
+
+        candidates = []
+        if role == "super_admin":
+            if tree is not None:
+                distances, indices = tree.query((query / scale).reshape(1, -1), k=min(k, len(rows)))
+                candidates = [(d, rows[i]) for d, i in zip(distances[0], indices[0])]
+        else:
+            # A single user's history is small, so a vectorised scan beats filtering the global tree
+            own = np.flatnonzero(usernames == username)
+            if len(own):
+                distances = np.linalg.norm((features[own] - query) / scale, axis=1)
+                candidates = [(distances[j], rows[i]) for j, i in enumerate(own)]
+            pending = [r for r in pending if r["username"] == username]
+
+        for row in pending:
+            distance = np.linalg.norm((np.asarray(row["features"]) - query) / scale)
+            candidates.append((distance, row))
+
+    candidates.sort(key=lambda c: c[0])
+
+    results = []
+    for distance, row in candidates[:k]:
+        result = {key: value for key, value in row.items() if key != "features"}
+        result.update(dict(zip(FEATURES, row["features"])))
+        result["distance"] = float(distance)
+        results.append(result)
+    return results
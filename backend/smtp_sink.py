@@ -0,0 +1,108 @@
+# backend/smtp_sink.py
+# Local SMTP stand-in for development and benchmarks: accepts mail and keeps it in memory.
+# Run from the project root: python -m backend.smtp_sink [port]
+import sys
+import time
+import threading
+import socketserver
+
+SINK_HOST = 'localhost'
+SINK_PORT = 1025
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """One SMTP session: enough of RFC 5321 for smtplib clients"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        server = self.server
+        mail_from, rcpt_tos = None, []
+        self.reply(f"220 {SINK_HOST} SMTP sink ready")
+        for raw in self.rfile:
+            command, _, argument = raw.decode('utf-8', 'replace').rstrip("\r\n").partition(" ")
+            command = command.upper()
+            if command == "EHLO":
+                self.wfile.write(f"250-{SINK_HOST}\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n".encode('ascii'))
+            elif command == "HELO":
+                self.reply(f"250 {SINK_HOST}")
+            elif command == "MAIL":
+                mail_from, rcpt_tos = argument.partition(":")[2].strip().split(" ")[0].strip("<>"), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                if server.should_fail():
+                    self.reply("451 Temporary failure, try again later")
+                else:
+                    rcpt_tos.append(argument.partition(":")[2].strip().strip("<>"))
+                    self.reply("250 OK")
+            elif command == "DATA":
+                if not rcpt_tos:
+                    self.reply("503 No valid recipients")
+                    continue
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                if server.latency:
+                    time.sleep(server.latency)
+                server.deliver(mail_from, rcpt_tos, b"".join(lines))
+                mail_from, rcpt_tos = None, []
+                self.reply("250 OK: queued")
+            elif command == "RSET":
+                mail_from, rcpt_tos = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Command not implemented")
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server that accepts every message
+
+    `latency` seconds are spent on each message to stand in for a real relay, and
+    every `fail_every`-th recipient is refused with a temporary (4xx) error so that
+    retries can be exercised. With `keep_messages`, accepted mail is kept in `messages`.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address=(SINK_HOST, SINK_PORT), latency=0.0, fail_every=0, keep_messages=True, verbose=False):
+        super().__init__(address, SMTPSinkHandler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.keep_messages = keep_messages
+        self.verbose = verbose
+        self.messages = []
+        self.received = 0
+        self.recipients_seen = 0
+        self._lock = threading.Lock()
+
+    def should_fail(self):
+        with self._lock:
+            self.recipients_seen += 1
+            return bool(self.fail_every) and self.recipients_seen % self.fail_every == 0
+
+    def deliver(self, mail_from, rcpt_tos, data):
+        with self._lock:
+            self.received += 1
+            if self.keep_messages:
+                self.messages.append({'from': mail_from, 'to': rcpt_tos, 'data': data})
+        if self.verbose:
+            print(f"Message from {mail_from} to {', '.join(rcpt_tos)} ({len(data)} bytes)")
+
+def start_smtp_sink(host=SINK_HOST, port=SINK_PORT, **options):
+    """Start an SMTP sink on a background thread (port 0 picks a free port)"""
+    server = SMTPSink((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else SINK_PORT
+    with SMTPSink((SINK_HOST, port), keep_messages=False, verbose=True) as server:
+        print(f"SMTP sink listening on {SINK_HOST}:{port}")
+        server.serve_forever()
@@ -0,0 +1,209 @@
+import os
+import json
+import threading
+import numpy as np
+from bisect import bisect_left
+
+# Directory index: one small row per user, sorted by lower-cased username
+USER_DIRECTORY_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'user_directory.json')
+
+# Analysis counts changed since the index was last written, one JSON line per saved analysis
+USER_DIRECTORY_JOURNAL_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'user_directory_journal.jsonl')
+
+# Bumped when the directory row layout changes, so older index files are rebuilt
+DIRECTORY_SCHEMA = 2
+
+# Default number of matches returned by a search
+SEARCH_LIMIT = 50
+
+# Sort orders supported by query_users
+SORT_KEYS = ['username', 'created_at', 'analyses_count']
+
+_lock = threading.Lock()
+_directory = {
+    "version": None,  # users.yaml version the loaded directory reflects
+    "keys": [],       # lower-cased usernames, sorted, for prefix search
+    "entries": [],    # directory rows aligned with keys
+    "totals": None,   # (users, analyses), computed on first use
+    "query": None     # filter columns and sort orders for query_users, built on first use
+}
+
+def directory_entry(profile):
+    """Build the directory row of a user"""
+    return {
+        'username': profile.username,
+        'name': profile.name,
+        'email': profile.email,
+        'role': profile.role,
+        'active': profile.is_active,
+        'analyses_count': len(profile.analyses),
+        'created_at': profile['created_at']
+    }
+
+def _install(version, entries):
+    """Make a sorted list of directory rows the in-memory directory"""
+    _directory.update({
+        "version": version,
+        "keys": [entry['username'].lower() for entry in entries],
+        "entries": entries,
+        "totals": None,
+        "query": None
+    })
+
+def write_user_directory(profiles, version):
+    """Rebuild the directory index from user profiles and save it"""
+    entries = sorted((directory_entry(p) for p in profiles.values()), key=lambda e: e['username'].lower())
+    os.makedirs(os.path.dirname(USER_DIRECTORY_FILE), exist_ok=True)
+    tmp_file = f"{USER_DIRECTORY_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump({'schema': DIRECTORY_SCHEMA, 'version': list(version) if version else None, 'entries': entries}, file, ensure_ascii=False)
+    os.replace(tmp_file, USER_DIRECTORY_FILE)
+
+    # The new index already includes every journaled count
+    tmp_file = f"{USER_DIRECTORY_JOURNAL_FILE}.{os.getpid()}.tmp"
+    open(tmp_file, 'wb').close()
+    os.replace(tmp_file, USER_DIRECTORY_JOURNAL_FILE)
+    with _lock:
+        _install(version, entries)
+
+def _find_entry(username):
+    """Get the position of a user's row in the loaded directory, None if absent"""
+    keys = _directory["keys"]
+    for i in range(bisect_left(keys, username.lower()), len(keys)):
+        if keys[i] != username.lower():
+            break
+        if _directory["entries"][i]['username'] == username:
+            return i
+    return None
+
+def _apply_count(username, analyses_count, version):
+    """Set one user's analysis count in the loaded directory"""
+    i = _find_entry(username)
+    if i is not None:
+        _directory["entries"][i]['analyses_count'] = analyses_count
+        _directory["totals"] = None
+        _directory["query"] = None
+    _directory["version"] = version
+
+def record_analysis_count(profile, version, previous_version):
+    """Journal a user's new analysis count after an analysis-only save of users.yaml
+
+    Appends one line instead of rewriting the whole index; the journal is folded in
+    when the index is read and cleared the next time it is written. The loaded
+    directory is updated in place only if it reflected the file before this save.
+    """
+    record = {'username': profile.username, 'analyses_count': len(profile.analyses), 'version': list(version) if version else None}
+    with _lock:
+        with open(USER_DIRECTORY_JOURNAL_FILE, 'ab') as file:
+            file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+        if previous_version is not None and _directory["version"] == previous_version:
+            _apply_count(profile.username, record['analyses_count'], version)
+
+def _load_directory():
+    """Get the directory, reading the index file or rebuilding it if users.yaml changed"""
+    from backend.auth import load_user_profiles, user_data_version
+
+    version = user_data_version()
+    with _lock:
+        if _directory["version"] == version:
+            return _directory
+
+        try:
+            with open(USER_DIRECTORY_FILE, 'r', encoding='utf-8') as file:
+                stored = json.load(file)
+            if stored.get('schema') == DIRECTORY_SCHEMA:
+                _install(tuple(stored.get('version') or ()), stored['entries'])
+                if os.path.exists(USER_DIRECTORY_JOURNAL_FILE):
+                    with open(USER_DIRECTORY_JOURNAL_FILE, 'rb') as file:
+                        for line in file:
+                            if line.endswith(b"\n"):
+                                record = json.loads(line)
+                                _apply_count(record['username'], record['analyses_count'], tuple(record['version'] or ()))
+                if _directory["version"] == version:
+                    return _directory
+        except (OSError, ValueError, KeyError):
+            pass
+
+    # Index missing or stale: rebuild from the full store once
+    write_user_directory(load_user_profiles(), version)
+    return _directory
+
+def search_users(prefix="", limit=SEARCH_LIMIT):
+    """Find users whose username starts with a prefix (case-insensitive)
+
+    Returns directory rows (username, name, email, role, active, analyses_count,
+    created_at) in username order, without loading anyone's analyses.
+    """
+    directory = _load_directory()
+    keys, entries = directory["keys"], directory["entries"]
+    prefix = (prefix or "").strip().lower()
+
+    results = []
+    for i in range(bisect_left(keys, prefix), len(keys)):
+        if not keys[i].startswith(prefix) or (limit is not None and len(results) >= limit):
+            break
+        results.append(entries[i])
+    return results
+
+def get_user_count():
+    """Get the number of users in the directory"""
+    return len(_load_directory()["entries"])
+
+def get_directory_totals():
+    """Get (users, analyses) totals across the directory"""
+    directory = _load_directory()
+    with _lock:
+        if directory["totals"] is None:
+            entries = directory["entries"]
+            directory["totals"] = (len(entries), sum(entry['analyses_count'] for entry in entries))
+        return directory["totals"]
+
+def _query_index(directory):
+    """Get the filter columns and precomputed sort orders of the directory"""
+    if directory["query"] is None:
+        entries = directory["entries"]
+        directory["query"] = {
+            'role': np.array([entry['role'] for entry in entries], dtype=object),
+            'active': np.array([entry['active'] for entry in entries], dtype=bool),
+            'text': [f"{entry['username']}\n{entry['name'] or ''}".lower() for entry in entries],
+            'order': {
+                'username': np.arange(len(entries)),
+                'created_at': np.argsort(np.array([entry['created_at'] or '' for entry in entries], dtype=str), kind='stable'),
+                'analyses_count': np.argsort(np.array([entry['analyses_count'] for entry in entries], dtype=np.int64), kind='stable')
+            }
+        }
+    return directory["query"]
+
+def query_users(role=None, status=None, name_contains=None, sort_by='username', descending=False, offset=0, limit=25):
+    """Get one page of directory rows with filters and sorting applied in the index
+
+    `status` is "active" or "inactive"; `name_contains` matches the name or username
+    (case-insensitive). Returns (rows, total matching). Sort orders are precomputed
+    when the directory changes, so an unfiltered page is a slice; filters are one
+    vectorised pass over the index.
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort_by}'")
+
+    directory = _load_directory()
+    with _lock:
+        entries = directory["entries"]
+        index = _query_index(directory)
+
+    order = index['order'][sort_by]
+    if descending:
+        order = order[::-1]
+
+    if role or status or name_contains:
+        mask = np.ones(len(entries), dtype=bool)
+        if role:
+            mask &= index['role'] == role
+        if status:
+            mask &= index['active'] == (status == "active")
+        if name_contains:
+            needle = name_contains.strip().lower()
+            mask &= np.fromiter((needle in text for text in index['text']), dtype=bool, count=len(entries))
+        order = order[mask[order]]
+
+    page = order[offset:] if limit is None else order[offset:offset + limit]
+    return [entries[i] for i in page], len(order)
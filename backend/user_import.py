@@ -0,0 +1,122 @@
+import os
+import csv
+import hashlib
+import multiprocessing
+from io import TextIOBase, TextIOWrapper
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.records import UserProfile
+
+# Columns every import file must have; `role` is optional
+REQUIRED_COLUMNS = ['username', 'password', 'email', 'name']
+
+# Passwords hashed per worker task
+HASH_CHUNK_SIZE = 2000
+
+# Below this many rows, starting a process pool costs more than hashing in-process
+PARALLEL_HASH_THRESHOLD = 20000
+
+# Hashing workers are not forked from the threaded Streamlit server (a fork could copy a held lock)
+POOL_CONTEXT = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+def hash_passwords(passwords):
+    """Hash a chunk of passwords (same digest as auth.hash_password; runs in a worker process)"""
+    return [hashlib.sha256(password.encode()).hexdigest() for password in passwords]
+
+def _hash_all(passwords, max_workers=None):
+    """Hash passwords, spreading large batches over a process pool"""
+    if len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return hash_passwords(passwords)
+
+    chunks = [passwords[i:i + HASH_CHUNK_SIZE] for i in range(0, len(passwords), HASH_CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=POOL_CONTEXT) as executor:
+        return [digest for chunk in executor.map(hash_passwords, chunks) for digest in chunk]
+
+def validate_user_rows(rows, existing_usernames, allowed_roles, default_role="user"):
+    """Validate CSV rows one at a time
+
+    Yields (row number, username, user fields, None) for valid rows and
+    (row number, username, None, error message) for invalid ones.
+    Rows are checked against the same rules as register_user, plus the roles the
+    importing admin may assign and usernames earlier in the file.
+    """
+    seen = set()
+    for line, row in enumerate(rows, start=2):
+        username = (row.get('username') or '').strip()
+        password = row.get('password') or ''
+        email = (row.get('email') or '').strip()
+        name = (row.get('name') or '').strip()
+        role = (row.get('role') or '').strip().lower() or default_role
+
+        if not all([username, password, email, name]):
+            yield line, username, None, "All fields are required"
+        elif len(password) < 6:
+            yield line, username, None, "Password must be at least 6 characters long"
+        elif username in existing_usernames:
+            yield line, username, None, "Username already exists"
+        elif username in seen:
+            yield line, username, None, "Duplicate username in file"
+        elif role not in allowed_roles:
+            yield line, username, None, f"You cannot assign the '{role}' role"
+        else:
+            seen.add(username)
+            yield line, username, {'username': username, 'password': password, 'email': email, 'name': name, 'role': role}, None
+
+def import_users_csv(file, default_role="user", max_workers=None):
+    """Import users from a CSV file (super admin only)
+
+    The file (binary or text) is streamed and validated row by row, passwords are
+    hashed in bulk, and all new accounts are saved with a single write.
+    Returns (number of users created, list of {'row', 'username', 'message'} errors).
+    """
+    from backend.auth import get_user_role, load_user_profiles, save_user_profiles, ASSIGNABLE_ROLES
+    from backend.analytics import record_signups
+
+    current_role = get_user_role()
+    if current_role != "super_admin":
+        return 0, [{'row': None, 'username': None, 'message': "Permission denied"}]
+
+    if not isinstance(file, TextIOBase):
+        file = TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(file)
+    valid = []
+    errors = []
+    try:
+        reader.fieldnames = [f.strip().lower() for f in reader.fieldnames or []]
+        missing = [column for column in REQUIRED_COLUMNS if column not in reader.fieldnames]
+        if missing:
+            return 0, [{'row': 1, 'username': None, 'message': f"Missing columns: {', '.join(missing)}"}]
+
+        profiles = load_user_profiles()
+        for line, username, user, error in validate_user_rows(reader, profiles, ASSIGNABLE_ROLES.get(current_role, []), default_role):
+            if error:
+                errors.append({'row': line, 'username': username, 'message': error})
+            else:
+                valid.append(user)
+    except UnicodeDecodeError:
+        # Nothing is imported from a file that cannot be read to the end
+        return 0, errors + [{'row': None, 'username': None, 'message': "File is not UTF-8 encoded; save it as CSV UTF-8 and try again"}]
+
+    if not valid:
+        return 0, errors
+
+    hashes = _hash_all([user['password'] for user in valid], max_workers)
+    created_at = datetime.now()
+    new_profiles = [
+        UserProfile(
+            user['username'],
+            password=password_hash,
+            email=user['email'],
+            name=user['name'],
+            role=user['role'],
+            created_at=created_at
+        )
+        for user, password_hash in zip(valid, hashes)
+    ]
+
+    for profile in new_profiles:
+        profiles[profile.username] = profile
+    save_user_profiles(profiles)
+    record_signups(new_profiles)
+    return len(new_profiles), errors
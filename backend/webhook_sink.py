@@ -0,0 +1,57 @@
+# backend/webhook_sink.py
+# Local webhook endpoint for development: accepts JSON POSTs and keeps them in memory.
+# Run from the project root: python -m backend.webhook_sink [port]
+import sys
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SINK_HOST = 'localhost'
+SINK_PORT = 8765
+
+class WebhookSinkHandler(BaseHTTPRequestHandler):
+    """Accept any POST and record its JSON body"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+        self.server.deliver(self.path, payload)
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class WebhookSink(ThreadingHTTPServer):
+    """Threaded HTTP server that records every webhook it receives in `requests`"""
+    daemon_threads = True
+
+    def __init__(self, address=(SINK_HOST, SINK_PORT), verbose=False):
+        super().__init__(address, WebhookSinkHandler)
+        self.verbose = verbose
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def deliver(self, path, payload):
+        with self._lock:
+            self.requests.append({'path': path, 'payload': payload})
+        if self.verbose:
+            print(f"Webhook {path}: {payload.get('subject', '')}")
+
+def start_webhook_sink(host=SINK_HOST, port=SINK_PORT, **options):
+    """Start a webhook sink on a background thread (port 0 picks a free port)"""
+    server = WebhookSink((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else SINK_PORT
+    with WebhookSink((SINK_HOST, port), verbose=True) as server:
+        print(f"Webhook sink listening on http://{SINK_HOST}:{port}/")
+        server.serve_forever()
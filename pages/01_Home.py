@@ -1,7 +1,7 @@
 import streamlit as st
 import datetime
 from backend.auth import is_authenticated, get_user_role
-from backend.cms_manager import get_home_content
+from backend.cms_manager import get_home_content, get_cms_version
 from backend.contact_api import save_contact_message
 from backend.newsletter_api import add_subscriber
 
@@ -159,36 +159,48 @@ def hero_section():
         if st.button("Get Started Today", key="hero_cta", use_container_width=True):
             st.switch_page("pages/2_Login.py")
 
-def about_section():
-    """About Us section"""
+@st.cache_data(max_entries=4)
+def render_cms_fragments(cms_version):
+    """Render the CMS-driven Home page text, once per CMS version"""
     cms_content = get_home_content()
+    vision = cms_content.get("vision", "Vision content not available")
+    mission = cms_content.get("mission", "Mission content not available")
+    return {
+        'about': cms_content.get("about", "Content not available"),
+        'vision_lead': "> " + vision.split('.')[0] + ".",
+        'vision': vision,
+        'mission_lead': "> " + mission.split('.')[0] + ".",
+        'mission': mission
+    }
+
+def about_section(fragments):
+    """About Us section"""
     st.markdown('<div class="section">', unsafe_allow_html=True)
     st.markdown('<div class="about-card">', unsafe_allow_html=True)
     st.header("🌾 About AgriSakha")
-    st.markdown(cms_content.get("about", "Content not available"))
+    st.markdown(fragments['about'])
     st.markdown('</div></div>', unsafe_allow_html=True)
 
-def vision_mission_section():
+def vision_mission_section(fragments):
     """Vision and Mission sections with expanders"""
-    cms_content = get_home_content()
     st.markdown('<div class="section">', unsafe_allow_html=True)
 
     # Vision
     st.markdown('<div class="vision-card">', unsafe_allow_html=True)
     st.header("🎯 Our Vision")
-    st.markdown("> " + cms_content.get("vision", "Vision content not available").split('.')[0] + ".")
+    st.markdown(fragments['vision_lead'])
 
     with st.expander("Read More"):
-        st.markdown(cms_content.get("vision", "Vision content not available"))
+        st.markdown(fragments['vision'])
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Mission
     st.markdown('<div class="mission-card">', unsafe_allow_html=True)
     st.header("🚀 Our Mission")
-    st.markdown("> " + cms_content.get("mission", "Mission content not available").split('.')[0] + ".")
+    st.markdown(fragments['mission_lead'])
 
     with st.expander("Read More"):
-        st.markdown(cms_content.get("mission", "Mission content not available"))
+        st.markdown(fragments['mission'])
     st.markdown('</div></div>', unsafe_allow_html=True)
 
 def newsletter_section():
@@ -272,8 +284,11 @@ def footer():
 def main():
     render_navbar()
     hero_section()
-    about_section()
-    vision_mission_section()
+
+    # CMS text is re-rendered only when an admin saves a new version
+    fragments = render_cms_fragments(get_cms_version())
+    about_section(fragments)
+    vision_mission_section(fragments)
     newsletter_section()
     contact_section()
     footer()
@@ -1,7 +1,10 @@
 import streamlit as st
 from backend.auth import require_auth, get_current_user, get_user_role, logout
 import pandas as pd
-from datetime import datetime
+import numpy as np
+from datetime import datetime, timedelta
+from backend.analysis_columns import NUMERIC_COLUMNS, get_analysis_columns
+from ui_components import select_user
 
 # Page configuration
 st.set_page_config(
@@ -106,22 +109,48 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Rows per "View All" page
+HISTORY_PAGE_SIZE = 50
+
+def load_history_page(history, columns, analyses):
+    """Append the next page of the "View All" table, continuing from the cursor"""
+    rows = columns.select_rows(limit=HISTORY_PAGE_SIZE, after=history['cursor'], newest_first=True)
+    if len(rows):
+        history['rows'] = np.concatenate([history['rows'], rows])
+        history['cursor'] = (analyses[rows[-1]].timestamp, int(rows[-1]))
+    history['done'] = len(rows) < HISTORY_PAGE_SIZE or len(history['rows']) >= len(columns)
+    st.session_state.history_view = history
+    return history
+
+def _format_numbers(values, decimals):
+    """Round numeric values to strings, with 'N/A' for missing (NaN) values"""
+    values = pd.Series(values).round(decimals)
+    return values.astype(str).where(values.notna(), 'N/A')
+
+def history_dataframe(columns, rows):
+    """Analysis history table for the given rows, built from columnar arrays"""
+    timestamps = pd.to_datetime(columns.timestamps[rows], unit='us')
+    numeric = columns.numeric[rows]
+    area_units = pd.Series(columns.decode('area_unit', rows)).fillna('ha')
+    return pd.DataFrame({
+        'Date': timestamps.strftime('%Y-%m-%d'),
+        'Time': timestamps.strftime('%H:%M'),
+        'Crop': pd.Series(columns.decode('predicted_crop', rows)).fillna('N/A'),
+        'Area': _format_numbers(numeric[:, NUMERIC_COLUMNS.index('area')], 2) + ' ' + area_units,
+        'pH': numeric[:, NUMERIC_COLUMNS.index('ph')].round(1),
+        'Temperature': _format_numbers(numeric[:, NUMERIC_COLUMNS.index('temperature')], 1) + '°C',
+        'Selected Plan': pd.Series(columns.decode('selected_variant', rows)).fillna('N/A')
+    })
+
 def main():
-    from backend.auth import get_all_users, get_user_analyses
+    from backend.auth import get_user, get_user_analyses
 
     role = get_user_role()
 
     # Super admin can select user
     if role == "super_admin":
-        users = get_all_users()
-        if users:
-            user_options = list(users.keys())
-            selected_username = st.selectbox("Select User", user_options, index=user_options.index(st.session_state.username) if st.session_state.username in user_options else 0)
-            user_data = users.get(selected_username, {})
-            username = selected_username
-        else:
-            user_data = get_current_user()
-            username = st.session_state.get("username")
+        username = select_user(st.session_state.get("username"))
+        user_data = get_user(username) or get_current_user()
     else:
         user_data = get_current_user()
         username = st.session_state.get("username")
@@ -145,11 +174,12 @@ def main():
 
     # Stats Grid
     analyses = user_data.get('analyses', [])
-    total_analyses = len(analyses)
+    columns = get_analysis_columns(username, analyses)
+    total_analyses = len(columns)
 
-    # Calculate some stats
-    recent_analyses = [a for a in analyses if (datetime.now() - datetime.fromisoformat(a['timestamp'])).days <= 30]
-    crops_predicted = len(set(a['data'].get('predicted_crop', '') for a in analyses if a['data'].get('predicted_crop')))
+    # Calculate some stats (vectorised over the columnar history)
+    recent_analyses = columns.count_since(datetime.now() - timedelta(days=31))
+    crops_predicted = columns.distinct_count('predicted_crop')
 
     st.markdown("""
     <div class="stats-grid">
@@ -170,7 +200,7 @@ def main():
             <div class="stat-label">Account Type</div>
         </div>
     </div>
-    """.format(total_analyses=total_analyses, recent_analyses=len(recent_analyses), crops_predicted=crops_predicted, role=role.title()), unsafe_allow_html=True)
+    """.format(total_analyses=total_analyses, recent_analyses=recent_analyses, crops_predicted=crops_predicted, role=role.title()), unsafe_allow_html=True)
 
     # Quick Actions
     st.markdown('<div class="quick-actions">', unsafe_allow_html=True)
@@ -205,43 +235,48 @@ def main():
     st.markdown("### 📈 Recent Analyses")
 
     if analyses:
-        # Show last 5 analyses
-        for analysis in reversed(analyses[-5:]):
-            timestamp = datetime.fromisoformat(analysis['timestamp'])
-            data = analysis['data']
+        # Show last 5 analyses, fetched from the end of the time index
+        for analysis in get_user_analyses(username, limit=5, newest_first=True):
+            timestamp = analysis.timestamp
 
-            selected_plan = data.get('selected_variant', 'N/A')
+            selected_plan = analysis.selected_variant or 'N/A'
             st.markdown(f"""
             <div class="analysis-item">
                 <strong>{timestamp.strftime('%Y-%m-%d %H:%M')}</strong> -
-                Predicted: <strong>{data.get('predicted_crop', 'N/A')}</strong> -
-                Area: {data.get('area', 'N/A')} {data.get('area_unit', 'ha')} -
+                Predicted: <strong>{analysis.predicted_crop or 'N/A'}</strong> -
+                Area: {analysis.area if analysis.area is not None else 'N/A'} {analysis.area_unit or 'ha'} -
                 Plan: {selected_plan}
             </div>
             """, unsafe_allow_html=True)
 
-        if st.button("View All Analyses"):
+        history = st.session_state.get("history_view")
+        if history is None or history['username'] != username:
+            history = None
+
+        if history is None and st.button("View All Analyses"):
+            history = {'username': username, 'rows': np.empty(0, dtype=np.int64), 'cursor': None, 'done': False}
+            history = load_history_page(history, columns, analyses)
+
+        if history is not None:
             st.markdown("### 📋 All Analysis History")
-            if analyses:
-                # Create a dataframe for better display
-                df_data = []
-                for analysis in reversed(analyses):
-                    timestamp = datetime.fromisoformat(analysis['timestamp'])
-                    data = analysis['data']
-                    df_data.append({
-                        'Date': timestamp.strftime('%Y-%m-%d'),
-                        'Time': timestamp.strftime('%H:%M'),
-                        'Crop': data.get('predicted_crop', 'N/A'),
-                        'Area': f"{data.get('area', 'N/A')} {data.get('area_unit', 'ha')}",
-                        'pH': data.get('ph', 'N/A'),
-                        'Temperature': f"{data.get('temperature', 'N/A')}°C",
-                        'Selected Plan': data.get('selected_variant', 'N/A')
-                    })
-
-                df = pd.DataFrame(df_data)
-                st.dataframe(df, use_container_width=True)
-            else:
-                st.info("No analysis history yet. Start by analyzing your soil!")
+            # Table holds only the pages loaded so far, newest first
+            df = history_dataframe(columns, history['rows'])
+            st.dataframe(df, use_container_width=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                if not history['done'] and st.button(f"⬇️ Load {HISTORY_PAGE_SIZE} more", use_container_width=True):
+                    history = load_history_page(history, columns, analyses)
+                    st.rerun()
+            with col2:
+                st.download_button(
+                    "📥 Export Loaded Rows CSV",
+                    df.to_csv(index=False),
+                    f"analysis_history_{username}.csv",
+                    "text/csv",
+                    use_container_width=True
+                )
+            st.caption(f"Showing {len(history['rows'])} of {len(columns)} analyses")
     else:
         st.info("No analysis history yet. Start by analyzing your soil!")
 
@@ -1,8 +1,12 @@
 import streamlit as st
-from backend.auth import require_auth, get_user_role, get_current_user, get_all_users, update_user_role, deactivate_user, activate_user, get_user_activity, register_user
-from backend.cms_manager import load_cms_content, update_home_content, get_cms_metadata
-from backend.contact_api import load_contact_messages, save_contact_message
-from backend.newsletter_api import load_subscribers, add_subscriber
+from backend.auth import require_auth, get_user_role, get_current_user, update_user_role, deactivate_user, activate_user, get_user_activity, register_user, bulk_update_users, parse_user_updates_csv, ASSIGNABLE_ROLES
+from backend.user_directory import query_users
+from backend.user_import import import_users_csv
+from backend.cms_manager import load_cms_content, update_home_content, get_cms_metadata, get_cms_history, get_home_content_at, rollback_home_content
+from backend.contact_api import load_contact_messages, search_contact_messages, update_message_status, get_unread_count
+from backend.newsletter_api import list_subscribers, add_subscriber, get_subscriber_count, import_subscribers_csv, export_subscribers_csv
+from backend.notifications import get_queue_depth
+from backend.newsletter_sender import send_campaign, html_to_text, list_campaigns, get_campaign_statuses, SMTP_HOST, SMTP_PORT
 import json
 from datetime import datetime
 import csv
@@ -96,6 +100,34 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# User Management table options
+USER_PAGE_SIZES = [25, 50, 100]
+BULK_SELECT_LIMIT = 1000
+
+# Contact inbox page sizes
+MESSAGE_PAGE_SIZES = [10, 25, 50]
+
+# Newsletter subscribers shown per page
+SUBSCRIBER_PAGE_SIZE = 100
+
+USER_SORT_OPTIONS = {
+    "Username": "username",
+    "Created At": "created_at",
+    "Analyses Count": "analyses_count"
+}
+
+def user_table_row(entry):
+    """Format a user directory row for the User Management table"""
+    return {
+        "Username": entry['username'],
+        "Name": entry.get('name') or "",
+        "Email": entry.get('email') or "",
+        "Role": entry.get('role') or "user",
+        "Status": "Active" if entry.get('active', True) else "Inactive",
+        "Created At": entry.get('created_at') or "",
+        "Analyses Count": entry.get('analyses_count', 0)
+    }
+
 def main():
     user = get_current_user()
     role = get_user_role()
@@ -123,7 +155,7 @@ def main():
         # Metadata display
         st.markdown(f"""
         <div class="metadata">
-            Last Updated: {metadata.get('last_updated', 'Never')} by {metadata.get('updated_by', 'System')}
+            Version {metadata.get('version', 0)} · Last Updated: {metadata.get('last_updated', 'Never')} by {metadata.get('updated_by', 'System')}
         </div>
         """, unsafe_allow_html=True)
         
@@ -231,6 +263,31 @@ def main():
         
         st.markdown("**Mission:**")
         st.markdown(home_content.get("mission", ""))
+
+        # Version history and rollback
+        st.markdown("### 🕘 Version History")
+        history = get_cms_history()
+        if history:
+            st.dataframe([
+                {
+                    "Version": record["version"],
+                    "Updated At": record.get("updated_at", ""),
+                    "Updated By": record.get("updated_by", ""),
+                    "Changed": ", ".join(record["changes"].keys()),
+                    "Note": f"Rollback to v{record['rollback_of']}" if "rollback_of" in record else ""
+                }
+                for record in history
+            ], use_container_width=True)
+
+            earlier_versions = [record["version"] for record in history[1:]]
+            if earlier_versions:
+                rollback_version = st.selectbox("Version to restore", earlier_versions, format_func=lambda v: f"v{v}")
+                with st.expander(f"Content at v{rollback_version}"):
+                    st.json(get_home_content_at(rollback_version))
+                if st.button(f"↩️ Roll Back to v{rollback_version}"):
+                    rollback_home_content(rollback_version, user.get('username'))
+                    st.success(f"✅ Home page content restored from v{rollback_version}!")
+                    st.rerun()
         
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -250,35 +307,92 @@ def main():
                 else:
                     st.error("❌ Email already subscribed or invalid")
         
-        # Display subscribers
+        with st.expander("📥 Bulk Import Subscribers (CSV)"):
+            st.markdown("Column: `email`. Existing subscribers and repeated emails are skipped.")
+            subscriber_file = st.file_uploader("Subscribers CSV", type=["csv"], key="subscriber_import_csv")
+            if subscriber_file is not None and st.button("Import Subscribers"):
+                with st.spinner("Importing subscribers..."):
+                    added, errors = import_subscribers_csv(subscriber_file)
+                st.session_state.subscriber_import_result = {'added': added, 'errors': errors}
+
+            result = st.session_state.get("subscriber_import_result")
+            if result:
+                st.success(f"✅ Added {result['added']} subscribers")
+                if result['errors']:
+                    st.warning(f"⚠️ {len(result['errors'])} rows were not imported")
+                    st.dataframe(result['errors'][:SUBSCRIBER_PAGE_SIZE], use_container_width=True)
+                    output = StringIO()
+                    writer = csv.DictWriter(output, fieldnames=["row", "email", "message"])
+                    writer.writeheader()
+                    writer.writerows(result['errors'])
+                    st.download_button("📥 Download Error Report", output.getvalue(), "subscriber_import_errors.csv", "text/csv")
+
+        # Display subscribers, newest first, a page at a time
         st.subheader("Current Subscribers")
-        subscribers = load_subscribers()
-        
+        st.metric("Active Subscribers", get_subscriber_count())
+        _, subscriber_total = list_subscribers(limit=0)
+        subscriber_pages = max(1, -(-subscriber_total // SUBSCRIBER_PAGE_SIZE))
+        subscriber_page = st.number_input(f"Page (of {subscriber_pages})", min_value=1, max_value=subscriber_pages, value=1, step=1, key="subscriber_page")
+        subscribers, subscriber_total = list_subscribers(offset=(subscriber_page - 1) * SUBSCRIBER_PAGE_SIZE, limit=SUBSCRIBER_PAGE_SIZE)
+
         if subscribers:
             df_data = []
             for subscriber in subscribers:
                 df_data.append({
                     "Email": subscriber.get("email"),
                     "Subscribed At": subscriber.get("subscribed_at", ""),
-                    "Status": "Active"
+                    "Status": subscriber.get("status", "active").title()
                 })
 
             st.dataframe(df_data, use_container_width=True)
+            st.caption(f"Showing {(subscriber_page - 1) * SUBSCRIBER_PAGE_SIZE + 1}–{(subscriber_page - 1) * SUBSCRIBER_PAGE_SIZE + len(subscribers)} of {subscriber_total} subscribers")
 
-            # Export option
-            output = StringIO()
-            writer = csv.DictWriter(output, fieldnames=["Email", "Subscribed At", "Status"])
-            writer.writeheader()
-            writer.writerows(df_data)
-            csv_str = output.getvalue()
+            # Export option; the CSV is built only when the download is clicked
             st.download_button(
                 "📥 Export Subscribers",
-                csv_str,
+                export_subscribers_csv,
                 "newsletter_subscribers.csv",
                 "text/csv"
             )
         else:
             st.info("No subscribers yet.")
+
+        # Send a campaign to every active subscriber
+        st.subheader("Send Campaign")
+        with st.form("send_campaign_form"):
+            campaign_subject = st.text_input("Subject")
+            campaign_body = st.text_area("Message", height=200)
+            campaign_html = st.checkbox("Message is HTML")
+            send_btn = st.form_submit_button("📤 Send to Active Subscribers")
+
+            if send_btn:
+                if campaign_subject and campaign_body:
+                    progress_bar = st.progress(0.0)
+                    active_count = max(get_subscriber_count(), 1)
+                    summary = send_campaign(
+                        campaign_subject,
+                        html_to_text(campaign_body) if campaign_html else campaign_body,
+                        html_body=campaign_body if campaign_html else None,
+                        progress=lambda done: progress_bar.progress(min(done / active_count, 1.0))
+                    )
+                    if summary['error']:
+                        st.error(f"❌ Campaign stopped, the mail server is unavailable: {summary['error']} ({summary['sent']} sent, {summary['failed']} failed)")
+                    else:
+                        st.success(f"✅ Sent {summary['sent']} messages in {summary['seconds']:.1f}s ({summary['failed']} failed)")
+                else:
+                    st.error("❌ Subject and message are required")
+        st.caption(f"Mail is sent through {SMTP_HOST}:{SMTP_PORT}.")
+
+        campaigns = list_campaigns()
+        if campaigns:
+            st.dataframe([
+                {"Subject": c['subject'], "Sent At": c['started_at'], "Sent": c['sent'], "Failed": c['failed'], "Seconds": c['seconds']}
+                for c in campaigns
+            ], use_container_width=True)
+            failed_campaigns = [c for c in campaigns if c['failed']]
+            if failed_campaigns:
+                campaign = st.selectbox("Failed deliveries of", failed_campaigns, format_func=lambda c: f"{c['subject']} ({c['started_at']})")
+                st.dataframe(get_campaign_statuses(campaign['id'], status="failed"), use_container_width=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -286,48 +400,73 @@ def main():
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
         st.header("💬 Contact Messages")
         
-        # Display messages
-        messages = load_contact_messages()
-        
+        # Page through the inbox; only the messages shown are read from the log
+        col1, col2 = st.columns(2)
+        col1.metric("Unread Messages", get_unread_count())
+        col2.metric("Pending Notifications", get_queue_depth())
+        message_query = st.text_input("🔍 Search messages", placeholder="Name, email, crop or any word (prefixes work)", key="contact_search")
+        col1, col2 = st.columns(2)
+        with col1:
+            message_filter = st.selectbox("Show", ["All", "Unread", "Read"], key="contact_filter")
+        with col2:
+            message_page_size = st.selectbox("Messages per page", MESSAGE_PAGE_SIZES, key="contact_page_size")
+
+        message_status = None if message_filter == "All" else message_filter.lower()
+        _, message_total = search_contact_messages(message_query, limit=0, status=message_status)
+        message_pages = max(1, -(-message_total // message_page_size))
+        message_page = st.number_input(f"Page (of {message_pages})", min_value=1, max_value=message_pages, value=1, step=1, key="contact_page")
+        messages, message_total = search_contact_messages(message_query, offset=(message_page - 1) * message_page_size, limit=message_page_size, status=message_status)
+
         if messages:
             st.subheader("Recent Messages")
-            for message in reversed(messages[-10:]):  # Last 10 messages
-                with st.expander(f"Message from {message.get('name', 'Unknown')} - {message.get('created_at', '')}"):
+            for message in messages:
+                status = message.get('status', 'unread')
+                icon = "🔵" if status == "unread" else "⚪"
+                with st.expander(f"{icon} Message from {message.get('name', 'Unknown')} - {message.get('created_at', '')}"):
                     st.write(f"**Email:** {message.get('email')}")
                     st.write(f"**Subject:** {message.get('subject')}")
                     st.write(f"**Message:** {message.get('message')}")
                     
                     col1, col2 = st.columns(2)
                     with col1:
-                        if st.button(f"✅ Mark as Read", key=f"read_{message.get('id', '')}"):
-                            # TODO: Mark as read
-                            st.success("Marked as read!")
+                        if status == "unread":
+                            if st.button(f"✅ Mark as Read", key=f"read_{message.get('id', '')}"):
+                                update_message_status(message['id'], "read")
+                                st.rerun()
+                        else:
+                            if st.button(f"🔵 Mark as Unread", key=f"unread_{message.get('id', '')}"):
+                                update_message_status(message['id'], "unread")
+                                st.rerun()
                     with col2:
                         if st.button(f"📧 Reply", key=f"reply_{message.get('id', '')}"):
                             st.info("Reply functionality coming soon!")
-            
+            st.caption(f"Showing {(message_page - 1) * message_page_size + 1}–{(message_page - 1) * message_page_size + len(messages)} of {message_total} messages")
+
             # Export all messages
-            df_data = []
-            for message in messages:
-                df_data.append({
-                    "Name": message.get("name"),
-                    "Email": message.get("email"),
-                    "Subject": message.get("subject"),
-                    "Created At": message.get("created_at"),
-                    "Status": "Unread"  # TODO: Implement status
-                })
+            if st.button("📥 Prepare Messages Export"):
+                df_data = []
+                for message in load_contact_messages():
+                    df_data.append({
+                        "Name": message.get("name"),
+                        "Email": message.get("email"),
+                        "Subject": message.get("subject"),
+                        "Created At": message.get("created_at"),
+                        "Status": message.get("status", "unread").title()
+                    })
 
-            output = StringIO()
-            writer = csv.DictWriter(output, fieldnames=["Name", "Email", "Subject", "Created At", "Status"])
-            writer.writeheader()
-            writer.writerows(df_data)
-            csv_str = output.getvalue()
-            st.download_button(
-                "📥 Export Messages",
-                csv_str,
-                "contact_messages.csv",
-                "text/csv"
-            )
+                output = StringIO()
+                writer = csv.DictWriter(output, fieldnames=["Name", "Email", "Subject", "Created At", "Status"])
+                writer.writeheader()
+                writer.writerows(df_data)
+                csv_str = output.getvalue()
+                st.download_button(
+                    "📥 Export Messages",
+                    csv_str,
+                    "contact_messages.csv",
+                    "text/csv"
+                )
+        elif message_query:
+            st.info("No messages match this search.")
         else:
             st.info("No contact messages yet.")
         
@@ -337,57 +476,96 @@ def main():
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
         st.header("👥 User Management")
 
-        # Get all users
-        users = get_all_users()
-        if users is None:
+        if role not in ["admin", "super_admin"]:
             st.error("❌ Access denied. Admin privileges required.")
         else:
             st.subheader("All Registered Users")
 
-            # Prepare user data for display
-            user_data = []
-            for username, user_info in users.items():
-                activity = get_user_activity(username)
-                user_data.append({
-                    "Username": username,
-                    "Name": user_info.get("name", ""),
-                    "Email": user_info.get("email", ""),
-                    "Role": user_info.get("role", "user"),
-                    "Status": "Active" if user_info.get("active", True) else "Inactive",
-                    "Created At": user_info.get("created_at", ""),
-                    "Analyses Count": activity.get("analyses_count", 0) if activity else 0
-                })
+            # Filters and sorting are applied by the user directory, one page at a time
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                name_filter = st.text_input("🔍 Name or username contains")
+            with col2:
+                role_filter = st.selectbox("Role", ["All", "user", "admin", "super_admin"])
+            with col3:
+                status_filter = st.selectbox("Status", ["All", "Active", "Inactive"])
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                sort_label = st.selectbox("Sort by", list(USER_SORT_OPTIONS.keys()))
+            with col2:
+                descending = st.selectbox("Order", ["Ascending", "Descending"]) == "Descending"
+            with col3:
+                page_size = st.selectbox("Rows per page", USER_PAGE_SIZES)
+
+            query = {
+                'role': None if role_filter == "All" else role_filter,
+                'status': None if status_filter == "All" else status_filter.lower(),
+                'name_contains': name_filter or None,
+                'sort_by': USER_SORT_OPTIONS[sort_label],
+                'descending': descending
+            }
+            _, total = query_users(limit=0, **query)
+            page_count = max(1, -(-total // page_size))
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+            entries, total = query_users(offset=(page - 1) * page_size, limit=page_size, **query)
+            user_data = [user_table_row(entry) for entry in entries]
 
             if user_data:
                 st.dataframe(user_data, use_container_width=True)
+                st.caption(f"Showing {(page - 1) * page_size + 1}–{(page - 1) * page_size + len(user_data)} of {total} users")
+            else:
+                st.info("No users found.")
 
-                # Create new user (Super Admin only)
-                if role == "super_admin":
-                    st.subheader("➕ Create New User")
-                    with st.form("create_user_form"):
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            new_username = st.text_input("Username")
-                            new_email = st.text_input("Email")
-                        with col2:
-                            new_name = st.text_input("Full Name")
-                            new_password = st.text_input("Password", type="password")
-                            new_role = st.selectbox("Role", ["user", "admin", "super_admin"])
-
-                        create_btn = st.form_submit_button("Create User")
-
-                        if create_btn:
-                            if new_username and new_password and new_email and new_name:
-                                success, message = register_user(new_username, new_password, new_email, new_name, new_role)
-                                if success:
-                                    st.success(f"✅ User '{new_username}' created successfully with role '{new_role}'!")
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ {message}")
+            # Create new user (Super Admin only)
+            if role == "super_admin":
+                st.subheader("➕ Create New User")
+                with st.form("create_user_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        new_username = st.text_input("Username")
+                        new_email = st.text_input("Email")
+                    with col2:
+                        new_name = st.text_input("Full Name")
+                        new_password = st.text_input("Password", type="password")
+                        new_role = st.selectbox("Role", ["user", "admin", "super_admin"])
+
+                    create_btn = st.form_submit_button("Create User")
+
+                    if create_btn:
+                        if new_username and new_password and new_email and new_name:
+                            success, message = register_user(new_username, new_password, new_email, new_name, new_role)
+                            if success:
+                                st.success(f"✅ User '{new_username}' created successfully with role '{new_role}'!")
+                                st.rerun()
                             else:
-                                st.error("❌ All fields are required")
+                                st.error(f"❌ {message}")
+                        else:
+                            st.error("❌ All fields are required")
+
+                with st.expander("📥 Bulk Import Users (CSV)"):
+                    st.markdown("Columns: `username`, `password`, `email`, `name` and optionally `role`.")
+                    import_file = st.file_uploader("Users CSV", type=["csv"], key="user_import_csv")
+                    import_role = st.selectbox("Default role", ["user", "admin", "super_admin"], key="user_import_role")
+                    if import_file is not None and st.button("Import Users"):
+                        with st.spinner("Importing users..."):
+                            created, errors = import_users_csv(import_file, default_role=import_role)
+                        st.session_state.user_import_result = {'created': created, 'errors': errors}
 
-                # User management actions
+                    result = st.session_state.get("user_import_result")
+                    if result:
+                        st.success(f"✅ Created {result['created']} users")
+                        if result['errors']:
+                            st.warning(f"⚠️ {len(result['errors'])} rows were not imported")
+                            st.dataframe(result['errors'], use_container_width=True)
+                            output = StringIO()
+                            writer = csv.DictWriter(output, fieldnames=["row", "username", "message"])
+                            writer.writeheader()
+                            writer.writerows(result['errors'])
+                            st.download_button("📥 Download Error Report", output.getvalue(), "user_import_errors.csv", "text/csv")
+
+            if user_data:
+                # User management actions, for the users on the current page
                 st.subheader("User Actions")
 
                 col1, col2, col3 = st.columns(3)
@@ -400,10 +578,7 @@ def main():
 
                     # Get allowed roles based on current admin's role
                     admin_role = get_user_role()
-                    allowed_roles = {
-                        "super_admin": ["user", "admin", "super_admin"],
-                        "admin": ["user", "admin"]
-                    }.get(admin_role, ["user"])
+                    allowed_roles = ASSIGNABLE_ROLES.get(admin_role, ["user"])
 
                     new_role = st.selectbox("New Role", allowed_roles, index=allowed_roles.index(current_role) if current_role in allowed_roles else 0)
                     if st.button("Update Role"):
@@ -451,11 +626,60 @@ def main():
                         else:
                             st.error("❌ Could not retrieve activity data")
 
-                # Export users
+            # Bulk role/status changes, applied in a single write
+            st.subheader("Bulk Actions")
+            bulk_tab1, bulk_tab2 = st.tabs(["☑️ Select Users", "📄 CSV Upload"])
+
+            with bulk_tab1:
+                matching, matching_total = query_users(limit=BULK_SELECT_LIMIT, **query)
+                if matching_total > BULK_SELECT_LIMIT:
+                    st.caption(f"Listing the first {BULK_SELECT_LIMIT} of {matching_total} users matching the filters above.")
+                bulk_users = st.multiselect("Users", [entry['username'] for entry in matching])
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    bulk_action = st.selectbox("Action", ["Change role", "Activate", "Deactivate"])
+                with col2:
+                    bulk_role = st.selectbox("New role", ASSIGNABLE_ROLES.get(role, ["user"]), disabled=bulk_action != "Change role")
+
+                if st.button(f"Apply to {len(bulk_users)} users", disabled=not bulk_users):
+                    if bulk_action == "Change role":
+                        updates = [{'username': username, 'role': bulk_role} for username in bulk_users]
+                    else:
+                        updates = [{'username': username, 'active': bulk_action == "Activate"} for username in bulk_users]
+                    st.session_state.bulk_user_outcomes = bulk_update_users(updates)
+
+            with bulk_tab2:
+                st.markdown("Columns: `username`, `role` (blank keeps the current role), `status` (`active`, `inactive` or blank).")
+                uploaded = st.file_uploader("Upload CSV", type=["csv"], key="bulk_user_csv")
+                if uploaded is not None and st.button("Apply CSV"):
+                    try:
+                        csv_text = uploaded.getvalue().decode('utf-8-sig')
+                    except UnicodeDecodeError:
+                        st.error("❌ File is not UTF-8 encoded; save it as CSV UTF-8 and try again")
+                    else:
+                        updates, errors = parse_user_updates_csv(csv_text)
+                        st.session_state.bulk_user_outcomes = errors + bulk_update_users(updates)
+
+            outcomes = st.session_state.get("bulk_user_outcomes")
+            if outcomes:
+                succeeded = sum(1 for outcome in outcomes if outcome['success'])
+                if succeeded == len(outcomes):
+                    st.success(f"✅ Updated {succeeded} users")
+                else:
+                    st.warning(f"⚠️ Updated {succeeded} of {len(outcomes)} rows")
+                st.dataframe([
+                    {"Username": o['username'] or "", "Result": "✅" if o['success'] else "❌", "Message": o['message']}
+                    for o in outcomes
+                ], use_container_width=True)
+
+            # Export users matching the current filters
+            if total and st.button("📥 Prepare Users Export"):
+                matching, _ = query_users(limit=None, **query)
                 output = StringIO()
                 writer = csv.DictWriter(output, fieldnames=["Username", "Name", "Email", "Role", "Status", "Created At", "Analyses Count"])
                 writer.writeheader()
-                writer.writerows(user_data)
+                writer.writerows(user_table_row(entry) for entry in matching)
                 csv_str = output.getvalue()
                 st.download_button(
                     "📥 Export Users",
@@ -463,8 +687,6 @@ def main():
                     "users.csv",
                     "text/csv"
                 )
-            else:
-                st.info("No users found.")
 
         st.markdown('</div>', unsafe_allow_html=True)
 
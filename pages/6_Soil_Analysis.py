@@ -5,17 +5,16 @@ import joblib
 import json
 import os
 import sys
+import time
 from datetime import datetime
 import plotly.express as px
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from backend.pdf_reports import generate_pdf_report
+from backend.plans_store import load_plans
+
 # Crop images dictionary (using Unsplash images)
 crop_images = {
     'rice': 'https://images.unsplash.com/photo-1536304993881-ff6e9aefacd1?w=400',
@@ -59,100 +58,13 @@ def load_model_data():
         model = joblib.load(model_path)
         encoder = joblib.load(encoder_path)
 
-        with open(plans_path, 'r', encoding='utf-8') as f:
-            plans = json.load(f)
+        plans = load_plans()
 
         return model, encoder, plans
     except Exception as e:
         st.error(f"❌ Error loading model: {str(e)}")
         return None, None, None
 
-def generate_pdf_report(analysis_data, plan=None):
-    """Generate PDF report combining analysis data and implementation plan"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1  # Center
-    )
-    heading_style = ParagraphStyle(
-        'Heading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=20
-    )
-    normal_style = styles['Normal']
-
-    elements = []
-
-    # Title
-    elements.append(Paragraph("Soil Analysis Report", title_style))
-    elements.append(Spacer(1, 12))
-
-    # Date
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Predicted Crop
-    elements.append(Paragraph(f"Predicted Crop: {analysis_data['predicted_crop']}", heading_style))
-    elements.append(Paragraph("Confidence: 99.32%", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Soil Parameters Table
-    elements.append(Paragraph("Soil Parameters:", heading_style))
-
-    param_data = [
-        ['Parameter', 'Value', 'Unit'],
-        ['Nitrogen', f"{analysis_data['nitrogen']}", 'ppm'],
-        ['Phosphorus', f"{analysis_data['phosphorus']}", 'ppm'],
-        ['Potassium', f"{analysis_data['potassium']}", 'ppm'],
-        ['pH', f"{analysis_data['ph']}", ''],
-        ['Temperature', f"{analysis_data['temperature']}", '°C'],
-        ['Humidity', f"{analysis_data['humidity']}", '%'],
-        ['Rainfall', f"{analysis_data['rainfall']}", 'cm'],
-        ['Area', f"{analysis_data['area']}", analysis_data['area_unit']]
-    ]
-
-    table = Table(param_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-
-    # Implementation Plan
-    if plan:
-        elements.append(Paragraph("Implementation Plan:", heading_style))
-        for key, value in plan.items():
-            elements.append(Paragraph(f"<b>{key.title()}:</b>", normal_style))
-            if isinstance(value, dict):
-                for sub_key, sub_value in value.items():
-                    elements.append(Paragraph(f"  • {sub_key}: {sub_value}", normal_style))
-            elif isinstance(value, list):
-                for item in value:
-                    elements.append(Paragraph(f"  • {item}", normal_style))
-            else:
-                elements.append(Paragraph(f"  {value}", normal_style))
-            elements.append(Spacer(1, 6))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
 def main():
     """Main soil analysis page"""
     # Initialize session state for standalone testing
@@ -191,6 +103,20 @@ def main():
         area = st.number_input("Area Size", min_value=0.1, max_value=1000.0, value=1.0, step=0.1)
         area_unit = st.selectbox("Area Unit", ["ha", "acre"])
 
+    # Robust recommendation settings
+    robust_mode = st.checkbox("🌦️ Robust recommendation (account for weather uncertainty)")
+    if robust_mode:
+        with st.expander("Weather Uncertainty Settings", expanded=True):
+            rcol1, rcol2, rcol3, rcol4 = st.columns(4)
+            with rcol1:
+                n_samples = st.number_input("Scenarios", min_value=100, max_value=20000, value=2000, step=100)
+            with rcol2:
+                temperature_std = st.number_input("Temperature spread (±°C)", min_value=0.0, max_value=15.0, value=2.0, step=0.5)
+            with rcol3:
+                humidity_std = st.number_input("Humidity spread (±%)", min_value=0.0, max_value=30.0, value=5.0, step=1.0)
+            with rcol4:
+                rainfall_spread = st.number_input("Rainfall spread (±%)", min_value=0.0, max_value=100.0, value=25.0, step=5.0)
+
     # Analyze button
     if st.button("🔍 Analyze Soil", use_container_width=True, type="primary"):
         # Prepare input data
@@ -291,6 +217,60 @@ def main():
             else:
                 st.info("No implementation plans available for this crop.")
 
+        # Robust recommendation under weather uncertainty
+        if robust_mode:
+            from backend.robustness import robust_recommendation
+            st.markdown("### 🌦️ Robust Recommendation")
+            distributions = {
+                'temperature': {'type': 'normal', 'scale': temperature_std},
+                'humidity': {'type': 'normal', 'scale': humidity_std},
+                'rainfall': {'type': 'lognormal', 'scale': rainfall_spread / 100}
+            }
+            start = time.perf_counter()
+            outcomes = robust_recommendation(model, encoder, analysis_data, int(n_samples), distributions)
+            elapsed = time.perf_counter() - start
+
+            df_outcomes = pd.DataFrame(outcomes)
+            df_outcomes['share'] = df_outcomes['share'] * 100
+            fig = px.bar(df_outcomes, x='crop', y='share', title="How often each crop wins (%)",
+                        labels={'crop': 'Crop', 'share': 'Win rate (%)'})
+            fig.update_layout(height=350, showlegend=False)
+            st.plotly_chart(fig, use_container_width=True)
+
+            best = outcomes[0]
+            st.markdown(f"**Most robust crop:** {best['crop']} "
+                        f"(wins {best['share'] * 100:.1f}% of {int(n_samples)} weather scenarios)")
+            st.caption(f"Evaluated in {elapsed * 1000:.0f} ms")
+
+        # Similar historical analyses
+        st.markdown("### 🔎 Similar Historical Analyses")
+        try:
+            from backend.auth import get_user_role
+            from backend.similarity_index import find_similar_analyses
+            similar = find_similar_analyses(
+                analysis_data,
+                k=5,
+                username=st.session_state.username,
+                role=get_user_role()
+            )
+            if similar:
+                df_similar = pd.DataFrame([{
+                    'User': s['username'],
+                    'Date': s['timestamp'][:10] if s['timestamp'] else 'N/A',
+                    'Recommended Crop': s['predicted_crop'] or 'N/A',
+                    'Selected Plan': s['selected_variant'] or 'N/A',
+                    'Nitrogen': s['nitrogen'],
+                    'Phosphorus': s['phosphorus'],
+                    'Potassium': s['potassium'],
+                    'pH': s['ph'],
+                    'Distance': round(s['distance'], 3)
+                } for s in similar])
+                st.dataframe(df_similar, use_container_width=True)
+            else:
+                st.info("No historical analyses to compare with yet.")
+        except ImportError:
+            st.warning("Similar-sample search not available - running in standalone mode")
+
         # Export functionality
         st.markdown("### 📤 Export Results")
         col1, col2, col3 = st.columns(3)
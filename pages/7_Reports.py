@@ -1,15 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import os
-import json
 import joblib
+import tempfile
 from datetime import datetime
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
+from backend.group_reports import get_group_reports, group_report_csv_row, group_report_filename
+from backend.pdf_reports import get_group_pdf, is_group_pdf_cached, report_content_hash, write_history_pdf_report
+from backend.user_directory import search_users, get_user_count
+from ui_components import select_user, USER_PICKER_LIMIT
+from backend.plans_store import load_plans
 
 @st.cache_data
 def load_model_data():
@@ -27,154 +26,98 @@ def load_model_data():
         model = joblib.load(model_path)
         encoder = joblib.load(encoder_path)
 
-        with open(plans_path, 'r', encoding='utf-8') as f:
-            plans = json.load(f)
+        plans = load_plans()
 
         return model, encoder, plans
     except Exception as e:
         st.error(f"❌ Error loading model: {str(e)}")
         return None, None, None
 
-def generate_group_report(analyses_group, model, encoder, plans):
-    """Generate report for a group of 5 analyses"""
-    # Calculate averages
-    avg_nitrogen = np.mean([a['data']['nitrogen'] for a in analyses_group])
-    avg_phosphorus = np.mean([a['data']['phosphorus'] for a in analyses_group])
-    avg_potassium = np.mean([a['data']['potassium'] for a in analyses_group])
-    avg_ph = np.mean([a['data']['ph'] for a in analyses_group])
-    avg_temperature = np.mean([a['data']['temperature'] for a in analyses_group])
-    avg_humidity = np.mean([a['data']['humidity'] for a in analyses_group])
-    avg_rainfall = np.mean([a['data']['rainfall'] for a in analyses_group])
-
-    # Predict crop using averaged values
-    input_data = np.array([[avg_nitrogen, avg_phosphorus, avg_potassium, avg_ph, avg_temperature, avg_humidity, avg_rainfall]])
-    prediction_encoded = model.predict(input_data)[0]
-    predicted_crop = encoder.inverse_transform([prediction_encoded])[0]
-
-    # Get implementation plan
-    crop_info = plans.get(predicted_crop, {})
-    variants = list(crop_info.get('variants', {}).keys())
-    plan = None
-    if variants:
-        # Check if all analyses in group have the same selected variant
-        selected_variants = [a['data'].get('selected_variant') for a in analyses_group if a['data'].get('selected_variant')]
-        if selected_variants and len(set(selected_variants)) == 1 and selected_variants[0] in variants:
-            # Use the commonly selected variant
-            plan = crop_info['variants'][selected_variants[0]]
+def bulk_export_section():
+    """Bulk export of group reports for several users (super admin only)"""
+    with st.expander("📦 Bulk Export Group Reports"):
+        export_all = st.checkbox(f"Export all {get_user_count()} users", value=True)
+        if export_all:
+            selected_users = None
         else:
-            # Use first variant as default
-            plan = crop_info['variants'][variants[0]]
-
-    # Get date range
-    dates = [datetime.fromisoformat(a['timestamp']) for a in analyses_group]
-    start_date = min(dates).strftime('%Y-%m-%d')
-    end_date = max(dates).strftime('%Y-%m-%d')
-
-    return {
-        'group_id': f"Group {len(analyses_group)} analyses ({start_date} to {end_date})",
-        'predicted_crop': predicted_crop,
-        'avg_parameters': {
-            'nitrogen': avg_nitrogen,
-            'phosphorus': avg_phosphorus,
-            'potassium': avg_potassium,
-            'ph': avg_ph,
-            'temperature': avg_temperature,
-            'humidity': avg_humidity,
-            'rainfall': avg_rainfall
-        },
-        'plan': plan,
-        'analyses_count': len(analyses_group)
-    }
-
-def generate_group_pdf_report(report):
-    """Generate PDF report for group analysis"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1  # Center
-    )
-    heading_style = ParagraphStyle(
-        'Heading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=20
-    )
-    normal_style = styles['Normal']
-
-    elements = []
-
-    # Title
-    elements.append(Paragraph("Group Soil Analysis Report", title_style))
-    elements.append(Spacer(1, 12))
-
-    # Group Info
-    elements.append(Paragraph(f"Report ID: {report['group_id']}", normal_style))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Predicted Crop
-    elements.append(Paragraph(f"Predicted Crop: {report['predicted_crop']}", heading_style))
-    elements.append(Paragraph("Confidence: Based on averaged parameters", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Averaged Soil Parameters Table
-    elements.append(Paragraph("Averaged Soil Parameters:", heading_style))
-
-    param_data = [
-        ['Parameter', 'Average Value', 'Unit'],
-        ['Nitrogen', f"{report['avg_parameters']['nitrogen']:.1f}", 'ppm'],
-        ['Phosphorus', f"{report['avg_parameters']['phosphorus']:.1f}", 'ppm'],
-        ['Potassium', f"{report['avg_parameters']['potassium']:.1f}", 'ppm'],
-        ['pH', f"{report['avg_parameters']['ph']:.1f}", ''],
-        ['Temperature', f"{report['avg_parameters']['temperature']:.1f}", '°C'],
-        ['Humidity', f"{report['avg_parameters']['humidity']:.1f}", '%'],
-        ['Rainfall', f"{report['avg_parameters']['rainfall']:.1f}", 'cm']
-    ]
-
-    table = Table(param_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-
-    # Implementation Plan
-    if report['plan']:
-        elements.append(Paragraph("Implementation Plan:", heading_style))
-        for key, value in report['plan'].items():
-            elements.append(Paragraph(f"<b>{key.title()}:</b>", normal_style))
-            if isinstance(value, dict):
-                for sub_key, sub_value in value.items():
-                    elements.append(Paragraph(f"  • {sub_key}: {sub_value}", normal_style))
-            elif isinstance(value, list):
-                for item in value:
-                    elements.append(Paragraph(f"  • {item}", normal_style))
-            else:
-                elements.append(Paragraph(f"  {value}", normal_style))
-            elements.append(Spacer(1, 6))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+            query = st.text_input("🔍 Search users to export", placeholder="Username prefix", key="bulk_export_search")
+            options = [e['username'] for e in search_users(query, limit=USER_PICKER_LIMIT)]
+            selected_users = st.multiselect("Users to export", options)
+
+        if st.button("📦 Export ZIP", disabled=not (export_all or selected_users)):
+            model, encoder, plans = load_model_data()
+            if model is None:
+                return
+
+            from backend.bulk_export import export_group_reports_zip
+            progress = st.progress(0.0, text="Preparing group reports...")
+
+            def update_progress(done, total):
+                progress.progress(done / total if total else 1.0, text=f"Rendered {done} of {total} group reports")
+
+            # Full profiles (with analyses) are only loaded once an export is requested
+            from backend.auth import get_all_users
+            users = get_all_users() or {}
+            if selected_users is not None:
+                users = {username: users[username] for username in selected_users if username in users}
+
+            previous = st.session_state.pop('bulk_export', None)
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+
+            export_file = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+            try:
+                with export_file:
+                    count = export_group_reports_zip(
+                        users,
+                        model, encoder, plans, export_file,
+                        progress_callback=update_progress
+                    )
+            except BaseException:
+                # Interrupted (error, stop or rerun): don't leave a partial ZIP behind
+                os.remove(export_file.name)
+                raise
+            st.session_state.bulk_export = {'path': export_file.name, 'count': count}
+
+        export = st.session_state.get('bulk_export')
+        if export and os.path.exists(export['path']):
+            st.success(f"✅ Exported {export['count']} group reports")
+            with open(export['path'], 'rb') as export_data:
+                st.download_button(
+                    label="📥 Download ZIP",
+                    data=export_data,
+                    file_name=f"group_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime="application/zip"
+                )
+
+def history_report_section(username, analyses):
+    """Full-history PDF, rendered chunk by chunk into a temporary file"""
+    with st.expander("📚 Full History Report"):
+        st.markdown(f"All **{len(analyses)}** analyses in one multi-page PDF.")
+
+        if st.button("📚 Generate Full History PDF"):
+            previous = st.session_state.get('history_report')
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+
+            history_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+            with history_file:
+                write_history_pdf_report(analyses, history_file, title=f"Full Analysis History - {username}")
+            st.session_state.history_report = {'path': history_file.name, 'username': username}
+
+        history = st.session_state.get('history_report')
+        if history and history['username'] == username and os.path.exists(history['path']):
+            with open(history['path'], 'rb') as history_data:
+                st.download_button(
+                    label="📥 Download Full History PDF",
+                    data=history_data,
+                    file_name=f"analysis_history_{username}_{datetime.now().strftime('%Y%m%d')}.pdf",
+                    mime="application/pdf"
+                )
 
 def main():
     """Reports page"""
-    from backend.auth import require_auth, get_user_role, get_all_users
+    from backend.auth import require_auth, get_user_role
     require_auth()
 
     role = get_user_role()
@@ -185,12 +128,8 @@ def main():
 
     # Super admin can select user
     if role == "super_admin":
-        users = get_all_users()
-        if users:
-            user_options = list(users.keys())
-            selected_username = st.selectbox("Select User", user_options, index=user_options.index(st.session_state.username) if st.session_state.username in user_options else 0)
-        else:
-            selected_username = st.session_state.username
+        selected_username = select_user(st.session_state.username)
+        bulk_export_section()
     else:
         selected_username = st.session_state.username
 
@@ -200,27 +139,23 @@ def main():
         st.info("No analysis reports available.")
         return
 
+    history_report_section(selected_username, analyses)
+
     # Load model data
     model, encoder, plans = load_model_data()
     if model is None:
         return
 
-    # Group analyses in chunks of 5
-    group_size = 5
-    groups = [analyses[i:i + group_size] for i in range(0, len(analyses), group_size)]
-
-    # Filter out incomplete groups
-    complete_groups = [g for g in groups if len(g) == group_size]
+    # Completed groups of 5 come from the report cache; only new groups are computed
+    reports = get_group_reports(selected_username, analyses, model, encoder, plans)
 
-    if not complete_groups:
+    if not reports:
         st.info("Not enough analyses to generate group reports. Need at least 5 analyses per group.")
         return
 
-    st.markdown(f"### Group Reports ({len(complete_groups)} groups)")
-
-    for group_report in complete_groups:
-        report = generate_group_report(group_report, model, encoder, plans)
+    st.markdown(f"### Group Reports ({len(reports)} groups)")
 
+    for report in reports:
         with st.expander(f"📊 {report['group_id']} - Predicted: {report['predicted_crop']}"):
             col1, col2 = st.columns([1, 2])
 
@@ -264,36 +199,27 @@ def main():
                 col_pdf, col_csv = st.columns(2)
 
                 with col_pdf:
-                    pdf_buffer = generate_group_pdf_report(report)
-                    pdf_data = pdf_buffer.getvalue()
-                    st.download_button(
-                        label="📋 Download PDF",
-                        data=pdf_data,
-                        file_name=f"group_report_{report['group_id'].replace(' ', '_').replace('(', '').replace(')', '').replace('-', '_')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
+                    # PDFs are rendered on first request and served from cache afterwards
+                    pdf_key = f"pdf_{report_content_hash(report)}"
+                    if is_group_pdf_cached(report) or st.button("📋 Generate PDF", key=pdf_key, use_container_width=True):
+                        st.download_button(
+                            label="📋 Download PDF",
+                            data=get_group_pdf(report),
+                            file_name=group_report_filename(report, 'pdf'),
+                            mime="application/pdf",
+                            use_container_width=True,
+                            key=f"download_{pdf_key}"
+                        )
 
                 with col_csv:
                     # Create CSV data
-                    csv_data = {
-                        'Group ID': report['group_id'],
-                        'Predicted Crop': report['predicted_crop'],
-                        'Analyses Count': report['analyses_count'],
-                        'Avg Nitrogen (ppm)': report['avg_parameters']['nitrogen'],
-                        'Avg Phosphorus (ppm)': report['avg_parameters']['phosphorus'],
-                        'Avg Potassium (ppm)': report['avg_parameters']['potassium'],
-                        'Avg pH': report['avg_parameters']['ph'],
-                        'Avg Temperature (°C)': report['avg_parameters']['temperature'],
-                        'Avg Humidity (%)': report['avg_parameters']['humidity'],
-                        'Avg Rainfall (cm)': report['avg_parameters']['rainfall']
-                    }
+                    csv_data = group_report_csv_row(report)
                     df = pd.DataFrame([csv_data])
                     csv = df.to_csv(index=False)
                     st.download_button(
                         label="📊 Download CSV",
                         data=csv,
-                        file_name=f"group_report_{report['group_id'].replace(' ', '_').replace('(', '').replace(')', '').replace('-', '_')}.csv",
+                        file_name=group_report_filename(report, 'csv'),
                         mime="text/csv",
                         use_container_width=True
                     )
@@ -1,6 +1,6 @@
 import streamlit as st
 import os
-import json
+from backend.plans_store import load_plans
 
 # Load ML model and data
 @st.cache_data
@@ -20,8 +20,7 @@ def load_model_data():
         model = joblib.load(model_path)
         encoder = joblib.load(encoder_path)
 
-        with open(plans_path, 'r', encoding='utf-8') as f:
-            plans = json.load(f)
+        plans = load_plans()
 
         return model, encoder, plans
     except Exception as e:
@@ -0,0 +1,141 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import datetime, timedelta
+from backend.auth import require_auth, get_user_role
+from backend.analytics import get_rollups, HISTOGRAM_RANGES
+
+# Require admin authentication
+require_auth()
+if get_user_role() not in ["admin", "super_admin"]:
+    st.error("❌ Access denied. Admin privileges required.")
+    st.stop()
+
+# Custom CSS
+st.markdown("""
+<style>
+    .analytics-header {
+        background: linear-gradient(135deg, #2563eb 0%, #1d4ed8 100%);
+        color: white;
+        padding: 2rem;
+        border-radius: 0.5rem;
+        margin-bottom: 2rem;
+        text-align: center;
+    }
+    .analytics-title {
+        font-size: 2.5rem;
+        margin-bottom: 0.5rem;
+    }
+    .analytics-subtitle {
+        font-size: 1.2rem;
+        opacity: 0.9;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+# Date ranges offered for the time-series charts
+PERIODS = {
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "Last 365 days": 365,
+    "All time": None
+}
+
+FEATURE_LABELS = {
+    'nitrogen': "Nitrogen (ppm)",
+    'phosphorus': "Phosphorus (ppm)",
+    'potassium': "Potassium (ppm)",
+    'ph': "pH",
+    'temperature': "Temperature (°C)",
+    'humidity': "Humidity (%)",
+    'rainfall': "Rainfall (cm)"
+}
+
+def daily_crops_frame(rollups, since):
+    """Long table of (date, crop, analyses) from the daily per-crop rollup"""
+    rows = [
+        {'date': day, 'crop': crop, 'analyses': count}
+        for day, crops in rollups['daily_crops'].items() if since is None or day >= since
+        for crop, count in crops.items()
+    ]
+    df = pd.DataFrame(rows, columns=['date', 'crop', 'analyses'])
+    df['date'] = pd.to_datetime(df['date'])
+    return df.sort_values('date')
+
+def signups_frame(rollups, since):
+    """Daily and cumulative signups from the signup rollup"""
+    df = pd.DataFrame(sorted(rollups['daily_signups'].items()), columns=['date', 'signups'])
+    df['total_users'] = df['signups'].cumsum()
+    if since is not None:
+        df = df[df['date'] >= since]
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def histogram_frame(rollups, feature):
+    """Bin ranges and counts of one feature histogram"""
+    low, high = HISTOGRAM_RANGES[feature]
+    counts = rollups['histograms'][feature]
+    width = (high - low) / len(counts)
+    return pd.DataFrame({
+        'range': [f"{low + i * width:g}–{low + (i + 1) * width:g}" for i in range(len(counts))],
+        'analyses': counts
+    })
+
+def main():
+    st.markdown("""
+    <div class="analytics-header">
+        <h1 class="analytics-title">📈 Analytics</h1>
+        <p class="analytics-subtitle">Crop recommendations, soil trends and usage across the organization</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Every chart reads the pre-aggregated rollups; raw history is never scanned here
+    rollups = get_rollups()
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Users", rollups['users_count'])
+    col2.metric("Total Analyses", rollups['analyses_count'])
+    col3.metric("Crops Recommended", len({crop for crops in rollups['daily_crops'].values() for crop in crops}))
+
+    period = st.selectbox("Period", list(PERIODS.keys()))
+    days = PERIODS[period]
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d') if days else None
+
+    tab1, tab2, tab3 = st.tabs(["🌾 Crop Recommendations", "🧪 Soil Parameters", "👥 Usage"])
+
+    with tab1:
+        crops = daily_crops_frame(rollups, since)
+        if crops.empty:
+            st.info("No analyses in this period.")
+        else:
+            fig = px.bar(crops, x='date', y='analyses', color='crop', title="Daily analyses by recommended crop")
+            st.plotly_chart(fig, use_container_width=True)
+
+            totals = crops.groupby('crop', as_index=False)['analyses'].sum().sort_values('analyses', ascending=False)
+            fig = px.bar(totals, x='crop', y='analyses', title="Recommendations per crop")
+            st.plotly_chart(fig, use_container_width=True)
+
+    with tab2:
+        st.caption("Distributions cover all analyses ever saved.")
+        feature = st.selectbox("Soil parameter", list(FEATURE_LABELS.keys()), format_func=lambda f: FEATURE_LABELS[f])
+        histogram = histogram_frame(rollups, feature)
+        fig = px.bar(histogram, x='range', y='analyses', title=f"Distribution of {FEATURE_LABELS[feature]}")
+        st.plotly_chart(fig, use_container_width=True)
+
+    with tab3:
+        signups = signups_frame(rollups, since)
+        if signups.empty:
+            st.info("No signups in this period.")
+        else:
+            fig = px.bar(signups, x='date', y='signups', title="Daily signups")
+            st.plotly_chart(fig, use_container_width=True)
+            fig = px.line(signups, x='date', y='total_users', title="Registered users over time")
+            st.plotly_chart(fig, use_container_width=True)
+
+        daily_analyses = daily_crops_frame(rollups, since).groupby('date', as_index=False)['analyses'].sum()
+        if not daily_analyses.empty:
+            fig = px.line(daily_analyses, x='date', y='analyses', title="Daily analyses")
+            st.plotly_chart(fig, use_container_width=True)
+
+if __name__ == "__main__":
+    main()
@@ -8,14 +8,13 @@ import yaml
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
-from io import BytesIO
 import base64
 import streamlit_authenticator as stauth
 import hashlib
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
+from backend.group_reports import generate_group_reports
+from backend.records import Analysis
+from backend.pdf_reports import generate_pdf_report, generate_group_pdf_report
+from backend.plans_store import load_plans
 
 # Page configuration
 st.set_page_config(
@@ -169,100 +168,13 @@ def load_model_data():
         model = joblib.load(model_path)
         encoder = joblib.load(encoder_path)
 
-        with open(plans_path, 'r', encoding='utf-8') as f:
-            plans = json.load(f)
+        plans = load_plans()
 
         return model, encoder, plans
     except Exception as e:
         st.error(f"❌ Error loading model: {str(e)}")
         return None, None, None
 
-def generate_pdf_report(analysis_data, plan=None):
-    """Generate PDF report combining analysis data and implementation plan"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1  # Center
-    )
-    heading_style = ParagraphStyle(
-        'Heading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=20
-    )
-    normal_style = styles['Normal']
-
-    elements = []
-
-    # Title
-    elements.append(Paragraph("Soil Analysis Report", title_style))
-    elements.append(Spacer(1, 12))
-
-    # Date
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Predicted Crop
-    elements.append(Paragraph(f"Predicted Crop: {analysis_data['predicted_crop']}", heading_style))
-    elements.append(Paragraph("Confidence: 99.32%", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Soil Parameters Table
-    elements.append(Paragraph("Soil Parameters:", heading_style))
-
-    param_data = [
-        ['Parameter', 'Value', 'Unit'],
-        ['Nitrogen', f"{analysis_data['nitrogen']}", 'ppm'],
-        ['Phosphorus', f"{analysis_data['phosphorus']}", 'ppm'],
-        ['Potassium', f"{analysis_data['potassium']}", 'ppm'],
-        ['pH', f"{analysis_data['ph']}", ''],
-        ['Temperature', f"{analysis_data['temperature']}", '°C'],
-        ['Humidity', f"{analysis_data['humidity']}", '%'],
-        ['Rainfall', f"{analysis_data['rainfall']}", 'cm'],
-        ['Area', f"{analysis_data['area']}", analysis_data['area_unit']]
-    ]
-
-    table = Table(param_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-
-    # Implementation Plan
-    if plan:
-        elements.append(Paragraph("Implementation Plan:", heading_style))
-        for key, value in plan.items():
-            elements.append(Paragraph(f"<b>{key.title()}:</b>", normal_style))
-            if isinstance(value, dict):
-                for sub_key, sub_value in value.items():
-                    elements.append(Paragraph(f"  • {sub_key}: {sub_value}", normal_style))
-            elif isinstance(value, list):
-                for item in value:
-                    elements.append(Paragraph(f"  • {item}", normal_style))
-            else:
-                elements.append(Paragraph(f"  {value}", normal_style))
-            elements.append(Spacer(1, 6))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
 # Authentication functions
 def show_login_form():
     """Display login form"""
@@ -572,22 +484,16 @@ def show_reports():
     if model is None:
         return
 
-    # Group analyses in chunks of 5
-    group_size = 5
-    groups = [analyses[i:i + group_size] for i in range(0, len(analyses), group_size)]
+    # Build reports for every complete group of 5 with one batched prediction
+    reports = generate_group_reports([Analysis.from_dict(a) for a in analyses], model, encoder, plans)
 
-    # Filter out incomplete groups
-    complete_groups = [g for g in groups if len(g) == group_size]
-
-    if not complete_groups:
+    if not reports:
         st.info("Not enough analyses to generate group reports. Need at least 5 analyses per group.")
         return
 
-    st.markdown(f"### Group Reports ({len(complete_groups)} groups)")
-
-    for group_report in complete_groups:
-        report = generate_group_report(group_report, model, encoder, plans)
+    st.markdown(f"### Group Reports ({len(reports)} groups)")
 
+    for report in reports:
         with st.expander(f"📊 {report['group_id']} - Predicted: {report['predicted_crop']}"):
             col1, col2 = st.columns([1, 2])
 
@@ -665,137 +571,6 @@ def show_reports():
                         use_container_width=True
                     )
 
-def generate_group_report(analyses_group, model, encoder, plans):
-    """Generate report for a group of 5 analyses"""
-    # Calculate averages
-    avg_nitrogen = np.mean([a['data']['nitrogen'] for a in analyses_group])
-    avg_phosphorus = np.mean([a['data']['phosphorus'] for a in analyses_group])
-    avg_potassium = np.mean([a['data']['potassium'] for a in analyses_group])
-    avg_ph = np.mean([a['data']['ph'] for a in analyses_group])
-    avg_temperature = np.mean([a['data']['temperature'] for a in analyses_group])
-    avg_humidity = np.mean([a['data']['humidity'] for a in analyses_group])
-    avg_rainfall = np.mean([a['data']['rainfall'] for a in analyses_group])
-
-    # Predict crop using averaged values
-    input_data = np.array([[avg_nitrogen, avg_phosphorus, avg_potassium, avg_ph, avg_temperature, avg_humidity, avg_rainfall]])
-    prediction_encoded = model.predict(input_data)[0]
-    predicted_crop = encoder.inverse_transform([prediction_encoded])[0]
-
-    # Get implementation plan
-    crop_info = plans.get(predicted_crop, {})
-    variants = list(crop_info.get('variants', {}).keys())
-    plan = None
-    if variants:
-        # Use first variant as default
-        plan = crop_info['variants'][variants[0]]
-
-    # Get date range
-    dates = [datetime.fromisoformat(a['timestamp']) for a in analyses_group]
-    start_date = min(dates).strftime('%Y-%m-%d')
-    end_date = max(dates).strftime('%Y-%m-%d')
-
-    return {
-        'group_id': f"Group {len(analyses_group)} analyses ({start_date} to {end_date})",
-        'predicted_crop': predicted_crop,
-        'avg_parameters': {
-            'nitrogen': avg_nitrogen,
-            'phosphorus': avg_phosphorus,
-            'potassium': avg_potassium,
-            'ph': avg_ph,
-            'temperature': avg_temperature,
-            'humidity': avg_humidity,
-            'rainfall': avg_rainfall
-        },
-        'plan': plan,
-        'analyses_count': len(analyses_group)
-    }
-
-def generate_group_pdf_report(report):
-    """Generate PDF report for group analysis"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1  # Center
-    )
-    heading_style = ParagraphStyle(
-        'Heading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=20
-    )
-    normal_style = styles['Normal']
-
-    elements = []
-
-    # Title
-    elements.append(Paragraph("Group Soil Analysis Report", title_style))
-    elements.append(Spacer(1, 12))
-
-    # Group Info
-    elements.append(Paragraph(f"Report ID: {report['group_id']}", normal_style))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Predicted Crop
-    elements.append(Paragraph(f"Predicted Crop: {report['predicted_crop']}", heading_style))
-    elements.append(Paragraph("Confidence: Based on averaged parameters", normal_style))
-    elements.append(Spacer(1, 12))
-
-    # Averaged Soil Parameters Table
-    elements.append(Paragraph("Averaged Soil Parameters:", heading_style))
-
-    param_data = [
-        ['Parameter', 'Average Value', 'Unit'],
-        ['Nitrogen', f"{report['avg_parameters']['nitrogen']:.1f}", 'ppm'],
-        ['Phosphorus', f"{report['avg_parameters']['phosphorus']:.1f}", 'ppm'],
-        ['Potassium', f"{report['avg_parameters']['potassium']:.1f}", 'ppm'],
-        ['pH', f"{report['avg_parameters']['ph']:.1f}", ''],
-        ['Temperature', f"{report['avg_parameters']['temperature']:.1f}", '°C'],
-        ['Humidity', f"{report['avg_parameters']['humidity']:.1f}", '%'],
-        ['Rainfall', f"{report['avg_parameters']['rainfall']:.1f}", 'cm']
-    ]
-
-    table = Table(param_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-
-    # Implementation Plan
-    if report['plan']:
-        elements.append(Paragraph("Implementation Plan:", heading_style))
-        for key, value in report['plan'].items():
-            elements.append(Paragraph(f"<b>{key.title()}:</b>", normal_style))
-            if isinstance(value, dict):
-                for sub_key, sub_value in value.items():
-                    elements.append(Paragraph(f"  • {sub_key}: {sub_value}", normal_style))
-            elif isinstance(value, list):
-                for item in value:
-                    elements.append(Paragraph(f"  • {item}", normal_style))
-            else:
-                elements.append(Paragraph(f"  {value}", normal_style))
-            elements.append(Spacer(1, 6))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
 def show_about():
     """About page"""
     st.markdown("### ℹ️ About Smart Soil")
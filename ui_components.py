@@ -0,0 +1,23 @@
+import streamlit as st
+
+from backend.user_directory import search_users
+
+# Matches listed by the super admin user pickers
+USER_PICKER_LIMIT = 100
+
+def select_user(current_username):
+    """Super admin user picker backed by the user directory (prefix search)"""
+    query = st.text_input("🔍 Search users", placeholder="Username prefix", key="user_picker_search")
+    entries = search_users(query, limit=USER_PICKER_LIMIT)
+    labels = {e['username']: f"{e['username']} — {e['name']} ({e['role']}, {e['analyses_count']} analyses)" for e in entries}
+    if not labels:
+        st.info("No users match this search.")
+        return current_username
+
+    options = list(labels)
+    return st.selectbox(
+        "Select User",
+        options,
+        index=options.index(current_username) if current_username in options else 0,
+        format_func=lambda username: labels[username]
+    )